@@ -9,12 +9,16 @@ so reported metrics reflect actual live forecast behaviour.
 GBT is now trained and scored within the backtest — no heuristic weight boost.
 """
 
+import heapq
 import numpy as np
 import pandas as pd
 from datetime import timedelta
+from operator import itemgetter
 from engine.models import DayOfWeekModel, ExpSmoothingModel, GBTModel
 from engine.router import classify_lane, predict_intermittent, predict_periodic
-from engine.features import build_feature_matrix, predict_gbt_recursive
+from engine.features import (
+    build_feature_matrix, group_by_store_product, predict_gbt_recursive, store_product_mask,
+)
 from config.products import FORECAST_CONFIG
 
 
@@ -23,30 +27,38 @@ def compute_metrics(actual: np.ndarray, predicted: np.ndarray) -> dict:
     actual = np.array(actual, dtype=float)
     predicted = np.array(predicted, dtype=float)
 
-    mae = np.mean(np.abs(actual - predicted))
+    # Signed and absolute errors are formed once and shared by every metric
+    err = predicted - actual
+    abs_err = np.abs(err)
+
+    mae = abs_err.mean()
 
     # MAPE only where actual > 0
     nonzero = actual > 0
-    if nonzero.sum() > 0:
-        mape = np.mean(np.abs((actual[nonzero] - predicted[nonzero]) / actual[nonzero])) * 100
+    if nonzero.any():
+        mape = np.mean(abs_err[nonzero] / actual[nonzero]) * 100
     else:
         mape = np.nan
 
     # Weighted MAPE (better for intermittent demand)
-    wmape = np.sum(np.abs(actual - predicted)) / max(np.sum(actual), 1) * 100
+    wmape = abs_err.sum() / max(np.sum(actual), 1) * 100
 
     # Bias: positive = over-forecasting, negative = under-forecasting
-    bias = np.mean(predicted - actual)
+    bias = err.mean()
 
     # Accuracy rate: % of days where prediction is within 1 unit
-    within_1 = np.mean(np.abs(actual - predicted) <= 1) * 100
+    within_1 = np.mean(abs_err <= 1) * 100
+
+    # Round each precision group in one call rather than per scalar
+    mae, bias = np.round([mae, bias], 2).tolist()
+    mape, wmape, within_1 = np.round([mape, wmape, within_1], 1).tolist()
 
     return {
-        "mae": round(mae, 2),
-        "mape": round(mape, 1) if not np.isnan(mape) else None,
-        "wmape": round(wmape, 1),
-        "bias": round(bias, 2),
-        "accuracy_within_1": round(within_1, 1),
+        "mae": mae,
+        "mape": mape if not np.isnan(mape) else None,
+        "wmape": wmape,
+        "bias": bias,
+        "accuracy_within_1": within_1,
     }
 
 
@@ -101,6 +113,11 @@ def walk_forward_backtest(
     print(f"  Backtesting {len(stores)} stores x {len(products)} products over {test_days} days...")
     print(f"  Test period: {test_start.strftime('%m/%d/%Y')} - {max_date.strftime('%m/%d/%Y')}")
 
+    # Split demand by store-product in one hash-group pass; both loops below
+    # look series up here instead of string-comparing the full frame per pair.
+    sp_groups = group_by_store_product(daily_demand)
+    no_demand = daily_demand.iloc[:0]
+
     # ── Pre-classify all lanes using training data only ──────────────────
     # Also collect daily-lane pairs for GBT training filter
     lane_map = {}
@@ -109,9 +126,7 @@ def walk_forward_backtest(
 
     for store in stores:
         for product in products:
-            sp = daily_demand[
-                (daily_demand["store"] == store) & (daily_demand["product"] == product)
-            ]
+            sp = sp_groups.get((store, product), no_demand)
             train = sp[sp["date"] < test_start]
             if train["qty"].sum() == 0 and len(train) == 0:
                 lane_map[(store, product)] = "dormant"
@@ -131,9 +146,7 @@ def walk_forward_backtest(
         store_pairs = {(s, p) for (s, p) in daily_lane_pairs if s == store}
         if not store_pairs:
             continue
-        store_train = train_features[
-            train_features.apply(lambda r, _p=store_pairs: (r["store"], r["product"]) in _p, axis=1)
-        ]
+        store_train = train_features[store_product_mask(train_features, store_pairs)]
         if len(store_train) >= 20:
             gbt_s = GBTModel()
             gbt_s.fit(store_train)
@@ -150,9 +163,7 @@ def walk_forward_backtest(
 
     for store in stores:
         for product in products:
-            sp = daily_demand[
-                (daily_demand["store"] == store) & (daily_demand["product"] == product)
-            ].copy()
+            sp = sp_groups.get((store, product), no_demand).copy()
 
             if sp["qty"].sum() == 0:
                 continue
@@ -291,23 +302,29 @@ def evaluate_models_per_product(
         return {}
 
     metric_key = FORECAST_CONFIG.get("ensemble_weight_metric", "mae")
+    has_gbt_col = "pred_gbt" in daily.columns
     result = {}
 
-    for (store, product), group in daily.groupby(["store", "product"]):
+    for (store, product), group in daily.groupby(["store", "product"], observed=True):
         if len(group) < min_obs:
             continue
 
-        model_cols = {"dow": "pred_dow", "exp": "pred_exp"}
-        if "pred_gbt" in group.columns and group["pred_gbt"].notna().any():
-            model_cols["gbt"] = "pred_gbt"
+        # Pull columns out once and mask NaNs per model, rather than
+        # materialising a dropna() copy of the group for every model.
+        actual = group["actual"].to_numpy()
+        model_preds = {"dow": group["pred_dow"].to_numpy(), "exp": group["pred_exp"].to_numpy()}
+        if has_gbt_col:
+            gbt_vals = group["pred_gbt"].to_numpy()
+            if not np.isnan(gbt_vals).all():
+                model_preds["gbt"] = gbt_vals
 
         local_weights = {}
-        for name, col in model_cols.items():
-            valid = group.dropna(subset=[col])
-            if valid.empty:
+        for name, vals in model_preds.items():
+            mask = ~np.isnan(vals)
+            if not mask.any():
                 local_weights[name] = 0.0
                 continue
-            m = compute_metrics(valid["actual"].values, valid[col].values)
+            m = compute_metrics(actual[mask], vals[mask])
             err = m.get(metric_key, 100)
             local_weights[name] = 1.0 / max(err, 1e-3)
 
@@ -356,7 +373,7 @@ def generate_accuracy_report(
     has_gbt = "pred_gbt" in br.columns and br.loc[daily_mask, "pred_gbt"].notna().any()
     if daily_mask.any():
         if per_product_weights:
-            for (store, product), group_idx in br[daily_mask].groupby(["store", "product"]).groups.items():
+            for (store, product), group_idx in br[daily_mask].groupby(["store", "product"], observed=True).groups.items():
                 pw = per_product_weights.get((store, product), weights)
                 dw, ew, gw = pw.get("dow", 0.33), pw.get("exp", 0.34), pw.get("gbt", 0.33)
                 total_w = dw + ew + gw
@@ -388,10 +405,12 @@ def generate_accuracy_report(
                     ew * br.loc[daily_mask, "pred_exp"]
                 ) / (dw + ew)
 
-    # Lane distribution (unique store-product pairs per lane)
+    # Lane distribution (unique store-product pairs per lane), counted once
+    # and reused for the per-lane headers below.
+    lane_pairs = br[["store", "product", "lane"]].drop_duplicates()["lane"].value_counts().to_dict()
     dist_parts = []
     for lane_name in ["daily", "periodic", "intermittent", "dormant"]:
-        n = br[br["lane"] == lane_name].groupby(["store", "product"]).ngroups
+        n = lane_pairs.get(lane_name, 0)
         if n > 0:
             dist_parts.append(f"{n} {lane_name}")
     lines.append(f"\n  Lane distribution: {', '.join(dist_parts)}")
@@ -405,7 +424,7 @@ def generate_accuracy_report(
     daily_br = br[daily_mask]
     if not daily_br.empty:
         lines.append(f"\n{'-' * 70}")
-        n_daily = daily_br.groupby(["store", "product"]).ngroups
+        n_daily = lane_pairs["daily"]
         lines.append(f"  Lane 1 — Daily ML ({n_daily} products):")
         model_cols = [("dow", "Day-of-Week"), ("exp", "Exp Smoothing"), ("gbt", "GBT")]
         for model_name, label in model_cols:
@@ -428,7 +447,7 @@ def generate_accuracy_report(
     periodic_br = br[br["lane"] == "periodic"]
     if not periodic_br.empty:
         lines.append(f"\n{'-' * 70}")
-        n = periodic_br.groupby(["store", "product"]).ngroups
+        n = lane_pairs["periodic"]
         m = compute_metrics(periodic_br["actual"].values, periodic_br["pred_lane"].values)
         lines.append(f"  Lane 2 — Periodic ({n} products):")
         lines.append(f"    MAE={m['mae']}  WMAPE={m['wmape']}%  "
@@ -438,7 +457,7 @@ def generate_accuracy_report(
     intermittent_br = br[br["lane"] == "intermittent"]
     if not intermittent_br.empty:
         lines.append(f"\n{'-' * 70}")
-        n = intermittent_br.groupby(["store", "product"]).ngroups
+        n = lane_pairs["intermittent"]
         m = compute_metrics(intermittent_br["actual"].values, intermittent_br["pred_lane"].values)
         lines.append(f"  Lane 3 — Intermittent ({n} products):")
         lines.append(f"    MAE={m['mae']}  WMAPE={m['wmape']}%  "
@@ -448,7 +467,7 @@ def generate_accuracy_report(
     dormant_br = br[br["lane"] == "dormant"]
     if not dormant_br.empty:
         lines.append(f"\n{'-' * 70}")
-        n = dormant_br.groupby(["store", "product"]).ngroups
+        n = lane_pairs["dormant"]
         m = compute_metrics(dormant_br["actual"].values, dormant_br["pred_lane"].values)
         lines.append(f"  Lane 4 — Dormant ({n} products, predicting zero):")
         lines.append(f"    MAE={m['mae']}  WMAPE={m['wmape']}%  Bias={m['bias']:+.2f}")
@@ -474,16 +493,19 @@ def generate_accuracy_report(
     lines.append(f"\n{'-' * 70}")
     lines.append("  Products with Highest Error:")
     product_errors = []
-    for (store, product), group in active_br.groupby(["store", "product"]):
-        if group["actual"].sum() < 2:
+    for (store, product), group in active_br.groupby(["store", "product"], observed=True):
+        actual = group["actual"].to_numpy()
+        actual_total = actual.sum()
+        if actual_total < 2:
             continue
-        pm = compute_metrics(group["actual"].values, group["pred_lane"].values)
-        lane_label = group["lane"].iloc[0]
+        pm = compute_metrics(actual, group["pred_lane"].to_numpy())
+        lane_label = group["lane"].iat[0]
         product_errors.append((store, product, pm["wmape"], pm["mae"],
-                                group["actual"].sum(), lane_label))
+                                actual_total, lane_label))
 
-    product_errors.sort(key=lambda x: x[2], reverse=True)
-    for store, product, wmape, mae, total, lane_label in product_errors[:10]:
+    # Only the worst 10 are reported — partial selection, not a full sort
+    worst = heapq.nlargest(10, product_errors, key=itemgetter(2))
+    for store, product, wmape, mae, total, lane_label in worst:
         lines.append(f"    [{lane_label}] {store} / {product}: "
                      f"WMAPE={wmape}%, MAE={mae}, Total Actual={total:.0f}")
 
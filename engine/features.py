@@ -7,6 +7,20 @@ import numpy as np
 import pandas as pd
 from config.products import FORECAST_CONFIG
 
+# Cyclical calendar encodings, indexed by day-of-week (0-6) and
+# day-of-month (1-31). Built once so per-row/per-date lookups are a
+# table index instead of a trig call.
+_DOW_SIN = np.sin(2 * np.pi * np.arange(7) / 7)
+_DOW_COS = np.cos(2 * np.pi * np.arange(7) / 7)
+_DOM_SIN = np.sin(2 * np.pi * np.arange(32) / 31)
+_DOM_COS = np.cos(2 * np.pi * np.arange(32) / 31)
+
+# Volume-tier thresholds resolved once from config rather than walked
+# through nested dicts on every classification.
+_HIGH_TIER_MIN = FORECAST_CONFIG["volume_tiers"]["high"]["min_avg_demand"]
+_LOW_TIER_MIN = FORECAST_CONFIG["volume_tiers"]["low"]["min_avg_demand"]
+_VOLUME_TIERS = ["high", "low", "sporadic"]
+
 
 def add_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
     """Add time-based features from the date column."""
@@ -15,88 +29,79 @@ def add_calendar_features(df: pd.DataFrame) -> pd.DataFrame:
     df["day_of_month"] = df["date"].dt.day
     df["week_of_year"] = df["date"].dt.isocalendar().week.astype(int)
     df["month"] = df["date"].dt.month
-    df["is_weekend"] = (df["dow"] >= 5).astype(int)
-    df["is_monday"] = (df["dow"] == 0).astype(int)
-    df["is_friday"] = (df["dow"] == 4).astype(int)
+    df["is_weekend"] = (df["dow"] >= 5).astype(np.int8)
+    df["is_monday"] = (df["dow"] == 0).astype(np.int8)
+    df["is_friday"] = (df["dow"] == 4).astype(np.int8)
 
     # Cyclical encoding of day-of-week (captures that Sun and Mon are close)
-    df["dow_sin"] = np.sin(2 * np.pi * df["dow"] / 7)
-    df["dow_cos"] = np.cos(2 * np.pi * df["dow"] / 7)
+    dow = df["dow"].to_numpy()
+    df["dow_sin"] = _DOW_SIN[dow]
+    df["dow_cos"] = _DOW_COS[dow]
 
     # Cyclical encoding of day-of-month
-    df["dom_sin"] = np.sin(2 * np.pi * df["day_of_month"] / 31)
-    df["dom_cos"] = np.cos(2 * np.pi * df["day_of_month"] / 31)
+    dom = df["day_of_month"].to_numpy()
+    df["dom_sin"] = _DOM_SIN[dom]
+    df["dom_cos"] = _DOM_COS[dom]
 
     return df
 
 
 def add_lag_features(df: pd.DataFrame, lags=(1, 7, 14)) -> pd.DataFrame:
     """Add lagged demand features per store-product."""
-    df = df.sort_values(["store", "product", "date"]).copy()
+    # sort_values already returns a new frame, so no extra copy is needed
+    df = df.sort_values(["store", "product", "date"])
 
+    keys = [df["store"], df["product"]]
     for lag in lags:
-        df[f"lag_{lag}"] = df.groupby(["store", "product"])["qty"].shift(lag)
+        df[f"lag_{lag}"] = df.groupby(keys, observed=True)["qty"].shift(lag)
 
-    # Rolling averages
+    # Rolling averages over prior days. The shifted series is grouped once and
+    # windowed in a single groupby-rolling pass per statistic instead of a
+    # Python lambda per store-product.
+    prev = df.groupby(keys, observed=True)["qty"].shift(1)
     for window in (7, 14, 28):
-        df[f"rolling_mean_{window}"] = (
-            df.groupby(["store", "product"])["qty"]
-            .transform(lambda x: x.shift(1).rolling(window, min_periods=1).mean())
-        )
-        df[f"rolling_std_{window}"] = (
-            df.groupby(["store", "product"])["qty"]
-            .transform(lambda x: x.shift(1).rolling(window, min_periods=1).std())
-        )
+        rolling = _group_rolling(prev, keys, window)
+        df[f"rolling_mean_{window}"] = rolling.mean().droplevel([0, 1])
+        df[f"rolling_std_{window}"] = rolling.std().droplevel([0, 1])
 
     # Rolling max (captures spike patterns)
-    df["rolling_max_7"] = (
-        df.groupby(["store", "product"])["qty"]
-        .transform(lambda x: x.shift(1).rolling(7, min_periods=1).max())
-    )
+    df["rolling_max_7"] = _group_rolling(prev, keys, 7).max().droplevel([0, 1])
 
     # Last nonzero order qty — carries forward the size of the most recent
     # actual order. Distinct from lag_1 (which is 0 on non-order days).
     # shift(1) prevents look-ahead — today's row sees up to yesterday only.
-    df["last_order_qty"] = (
-        df.groupby(["store", "product"])["qty"]
-        .transform(lambda x: x.shift(1).replace(0, np.nan).ffill().fillna(0))
-    )
+    df["last_order_qty"] = prev.replace(0, np.nan).groupby(keys, observed=True).ffill().fillna(0)
 
     return df
 
 
+def _group_rolling(series: pd.Series, keys, window: int):
+    """Rolling window (min_periods=1) over series within each store-product."""
+    return series.groupby(keys, observed=True, sort=False).rolling(window, min_periods=1)
+
+
 def add_trend_features(df: pd.DataFrame) -> pd.DataFrame:
     """Add trend indicators comparing recent vs historical demand."""
-    df = df.sort_values(["store", "product", "date"]).copy()
-
-    # Short-term trend: 7-day avg / 28-day avg
-    rm7 = df.groupby(["store", "product"])["qty"].transform(
-        lambda x: x.shift(1).rolling(7, min_periods=1).mean()
-    )
-    rm28 = df.groupby(["store", "product"])["qty"].transform(
-        lambda x: x.shift(1).rolling(28, min_periods=1).mean()
-    )
+    df = df.sort_values(["store", "product", "date"])
+
+    # Short-term trend: 7-day avg / 28-day avg. Reuse the rolling means
+    # add_lag_features already stored; compute them only when called alone.
+    if "rolling_mean_7" in df.columns and "rolling_mean_28" in df.columns:
+        rm7, rm28 = df["rolling_mean_7"], df["rolling_mean_28"]
+    else:
+        keys = [df["store"], df["product"]]
+        prev = df.groupby(keys, observed=True)["qty"].shift(1)
+        rm7 = _group_rolling(prev, keys, 7).mean().droplevel([0, 1])
+        rm28 = _group_rolling(prev, keys, 28).mean().droplevel([0, 1])
     df["trend_7_28"] = (rm7 / rm28.replace(0, np.nan)).fillna(1.0).clip(0.2, 5.0)
 
-    # Days since last order (captures sporadic ordering)
-    def days_since_last(series):
-        result = []
-        last_order = None
-        for i, (val, date) in enumerate(zip(series.values, series.index)):
-            if last_order is not None:
-                result.append((date - last_order).days)
-            else:
-                result.append(0)
-            if val > 0:
-                last_order = date
-        return pd.Series(result, index=series.index)
-
-    df["days_since_last_order"] = (
-        df.set_index("date")
-        .groupby(["store", "product"])["qty"]
-        .transform(days_since_last)
-        .values
-    )
+    # Days since last order (captures sporadic ordering).
+    # Integer group codes + shift/ffill replace a Python loop per group:
+    # each row sees the most recent *previous* order date in its series.
+    codes = df.groupby(["store", "product"], observed=True, sort=False).ngroup()
+    order_dates = df["date"].where(df["qty"] > 0)
+    last_order = order_dates.groupby(codes).shift(1).groupby(codes).ffill()
+    df["days_since_last_order"] = (df["date"] - last_order).dt.days.fillna(0).astype(int)
 
     return df
 
@@ -106,27 +111,24 @@ def add_product_features(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
 
     # Historical average daily demand per store-product
-    hist_avg = df.groupby(["store", "product"])["qty"].transform("mean")
+    hist_avg = df.groupby(["store", "product"], observed=True)["qty"].transform("mean")
     df["product_hist_avg"] = hist_avg
 
     # Coefficient of variation (volatility measure)
-    hist_std = df.groupby(["store", "product"])["qty"].transform("std").fillna(0)
+    hist_std = df.groupby(["store", "product"], observed=True)["qty"].transform("std").fillna(0)
     df["product_cv"] = (hist_std / hist_avg.replace(0, np.nan)).fillna(0).clip(0, 10)
 
     # Order frequency (what fraction of days have non-zero orders)
-    df["order_frequency"] = df.groupby(["store", "product"])["qty"].transform(
-        lambda x: (x > 0).mean()
-    )
+    df["order_frequency"] = (df["qty"] > 0).groupby([df["store"], df["product"]], observed=True).transform("mean")
 
     return df
 
 
 def classify_volume_tier(avg_demand: float) -> str:
     """Classify a store-product into a volume tier based on avg daily demand."""
-    tiers = FORECAST_CONFIG["volume_tiers"]
-    if avg_demand >= tiers["high"]["min_avg_demand"]:
+    if avg_demand >= _HIGH_TIER_MIN:
         return "high"
-    elif avg_demand >= tiers["low"]["min_avg_demand"]:
+    elif avg_demand >= _LOW_TIER_MIN:
         return "low"
     else:
         return "sporadic"
@@ -135,21 +137,51 @@ def classify_volume_tier(avg_demand: float) -> str:
 def add_volume_tier(df: pd.DataFrame) -> pd.DataFrame:
     """Add volume_tier column based on per-store-product avg demand."""
     df = df.copy()
-    avg_demand = df.groupby(["store", "product"])["qty"].transform("mean")
-    df["volume_tier"] = avg_demand.apply(classify_volume_tier)
+    avg_demand = df.groupby(["store", "product"], observed=True)["qty"].transform("mean").to_numpy()
+    # Vectorized form of classify_volume_tier — one pass instead of a
+    # Python call per row. Stored as a categorical over int8 codes rather
+    # than one Python string object per row.
+    codes = np.select(
+        [avg_demand >= _HIGH_TIER_MIN, avg_demand >= _LOW_TIER_MIN],
+        [0, 1],
+        default=2,
+    ).astype(np.int8)
+    df["volume_tier"] = pd.Categorical.from_codes(codes, categories=_VOLUME_TIERS)
     return df
 
 
+def store_product_mask(df: pd.DataFrame, pairs) -> np.ndarray:
+    """
+    Boolean mask of rows whose (store, product) is in pairs.
+
+    Vectorized stand-in for a row-wise apply(axis=1) membership test.
+    """
+    if not pairs:
+        return np.zeros(len(df), dtype=bool)
+    keys = pd.MultiIndex.from_arrays([df["store"], df["product"]])
+    return keys.isin(list(pairs))
+
+
+def group_by_store_product(df: pd.DataFrame) -> dict:
+    """
+    Return {(store, product): rows} built in one groupby pass.
+
+    Replaces a boolean store/product filter of the whole frame for each pair
+    inside nested loops. Pairs with no rows are absent from the dict.
+    """
+    return dict(iter(df.groupby(["store", "product"], observed=True, sort=False)))
+
+
 def get_tier_map(daily_demand: pd.DataFrame) -> dict:
     """Return {(store, product): tier} mapping for all items."""
-    avg = daily_demand.groupby(["store", "product"])["qty"].mean()
+    avg = daily_demand.groupby(["store", "product"], observed=True)["qty"].mean()
     return {k: classify_volume_tier(v) for k, v in avg.items()}
 
 
 def build_feature_matrix(daily_demand: pd.DataFrame) -> pd.DataFrame:
     """Full feature engineering pipeline."""
-    df = daily_demand.copy()
-    df = add_calendar_features(df)
+    # add_calendar_features copies, so the caller's frame is never mutated
+    df = add_calendar_features(daily_demand)
     df = add_lag_features(df)
     df = add_trend_features(df)
     df = add_product_features(df)
@@ -197,9 +229,19 @@ def build_future_features(
     rs14 = recent_14.std() if len(recent_14) > 1 else 0
     rmax7 = recent_7.max()
     trend = (rm7 / rm28) if rm28 > 0 else 1.0
-
-    last_order_date = sp[sp["qty"] > 0]["date"].max() if (sp["qty"] > 0).any() else sp["date"].min()
-    last_order_qty = float(sp[sp["qty"] > 0]["qty"].iloc[-1]) if (sp["qty"] > 0).any() else 0.0
+    # Plain min/max on scalars — np.clip pays ufunc dispatch per call
+    trend_7_28 = min(max(float(trend), 0.2), 5.0)
+    product_cv = min(max(float(cv), 0.0), 10.0)
+
+    # Build the order-day mask once instead of re-filtering sp per statistic
+    qty = sp["qty"].to_numpy()
+    order_days = qty > 0
+    if order_days.any():
+        last_order_date = pd.Timestamp(sp["date"].to_numpy()[order_days].max())
+        last_order_qty = float(qty[order_days][-1])
+    else:
+        last_order_date = sp["date"].min()
+        last_order_qty = 0.0
 
     for d in forecast_dates:
         dow = d.dayofweek
@@ -209,10 +251,10 @@ def build_future_features(
             "is_weekend": int(dow >= 5),
             "is_monday": int(dow == 0),
             "is_friday": int(dow == 4),
-            "dow_sin": np.sin(2 * np.pi * dow / 7),
-            "dow_cos": np.cos(2 * np.pi * dow / 7),
-            "dom_sin": np.sin(2 * np.pi * d.day / 31),
-            "dom_cos": np.cos(2 * np.pi * d.day / 31),
+            "dow_sin": _DOW_SIN[dow],
+            "dow_cos": _DOW_COS[dow],
+            "dom_sin": _DOM_SIN[d.day],
+            "dom_cos": _DOM_COS[d.day],
             "lag_1": last_qty,
             "lag_7": recent_7.iloc[0] if len(recent_7) > 0 else 0,
             "lag_14": recent_14.iloc[0] if len(recent_14) > 0 else 0,
@@ -223,10 +265,10 @@ def build_future_features(
             "rolling_std_14": rs14,
             "rolling_max_7": rmax7,
             "last_order_qty": last_order_qty,
-            "trend_7_28": np.clip(trend, 0.2, 5.0),
+            "trend_7_28": trend_7_28,
             "days_since_last_order": (d - last_order_date).days if pd.notna(last_order_date) else 0,
             "product_hist_avg": hist_avg,
-            "product_cv": np.clip(cv, 0, 10),
+            "product_cv": product_cv,
             "order_frequency": order_freq,
         }
         rows.append(row)
@@ -255,18 +297,28 @@ def predict_gbt_recursive(
         return np.zeros(len(forecast_dates))
 
     sp = sp_demand.sort_values("date")
-    buf_qty = list(sp["qty"].values.astype(float))
-    buf_dates = list(pd.to_datetime(sp["date"].values))
+    # History plus room for every forecast day; buf[:n] is the live window and
+    # each prediction is written in place instead of re-copying a list per day.
+    n = len(sp)
+    buf_qty = np.empty(n + len(forecast_dates), dtype=float)
+    buf_qty[:n] = sp["qty"].values.astype(float)
+    # Dates as integer day numbers so days_since_last_order is a subtraction
+    buf_days = np.empty(len(buf_qty), dtype=np.int64)
+    buf_days[:n] = sp["date"].values.astype("datetime64[D]").astype(np.int64)
+    forecast_days = forecast_dates.values.astype("datetime64[D]").astype(np.int64)
+    nonzero_idx = np.flatnonzero(buf_qty[:n] > 0)
+    last_nonzero = int(nonzero_idx[-1]) if len(nonzero_idx) > 0 else -1
 
     hist_avg = float(sp["qty"].mean())
     hist_std = float(sp["qty"].std()) if len(sp) > 1 else 0.0
     cv = float(hist_std / hist_avg) if hist_avg > 0 else 0.0
     order_freq = float((sp["qty"] > 0).mean())
+    product_cv = min(max(cv, 0.0), 10.0)
 
-    preds = []
-    for d in forecast_dates:
-        buf = np.array(buf_qty)
-        n = len(buf)
+    feature_cols = model.FEATURE_COLS
+    preds = np.empty(len(forecast_dates), dtype=float)
+    for i, d in enumerate(forecast_dates):
+        buf = buf_qty[:n]
 
         lag_1 = float(buf[-1]) if n >= 1 else 0.0
         lag_7 = float(buf[-7]) if n >= 7 else (float(buf[0]) if n > 0 else 0.0)
@@ -282,14 +334,14 @@ def predict_gbt_recursive(
         rs7 = float(r7.std()) if len(r7) > 1 else 0.0
         rs14 = float(r14.std()) if len(r14) > 1 else 0.0
         rmax7 = float(r7.max()) if len(r7) > 0 else 0.0
-        trend = float(np.clip(rm7 / rm28, 0.2, 5.0)) if rm28 > 0 else 1.0
-
-        nonzero_mask = buf > 0
-        last_order_qty = float(buf[nonzero_mask][-1]) if nonzero_mask.any() else 0.0
+        trend = min(max(rm7 / rm28, 0.2), 5.0) if rm28 > 0 else 1.0
 
-        nonzero_idx = np.where(nonzero_mask)[0]
-        last_order_date = buf_dates[nonzero_idx[-1]] if len(nonzero_idx) > 0 else buf_dates[0]
-        days_since = (d - pd.Timestamp(last_order_date)).days
+        if last_nonzero >= 0:
+            last_order_qty = float(buf[last_nonzero])
+            days_since = int(forecast_days[i] - buf_days[last_nonzero])
+        else:
+            last_order_qty = 0.0
+            days_since = int(forecast_days[i] - buf_days[0])
 
         dow = d.dayofweek
         row = {
@@ -298,10 +350,10 @@ def predict_gbt_recursive(
             "is_weekend": int(dow >= 5),
             "is_monday": int(dow == 0),
             "is_friday": int(dow == 4),
-            "dow_sin": np.sin(2 * np.pi * dow / 7),
-            "dow_cos": np.cos(2 * np.pi * dow / 7),
-            "dom_sin": np.sin(2 * np.pi * d.day / 31),
-            "dom_cos": np.cos(2 * np.pi * d.day / 31),
+            "dow_sin": _DOW_SIN[dow],
+            "dow_cos": _DOW_COS[dow],
+            "dom_sin": _DOM_SIN[d.day],
+            "dom_cos": _DOM_COS[d.day],
             "lag_1": lag_1,
             "lag_7": lag_7,
             "lag_14": lag_14,
@@ -315,14 +367,21 @@ def predict_gbt_recursive(
             "trend_7_28": trend,
             "days_since_last_order": days_since,
             "product_hist_avg": hist_avg,
-            "product_cv": float(np.clip(cv, 0, 10)),
+            "product_cv": product_cv,
             "order_frequency": order_freq,
         }
 
-        pred = max(0.0, float(model.predict(pd.DataFrame([row]))[0]))
-        preds.append(pred)
+        # One-row array straight to the estimator: wrapping each day's row in
+        # a DataFrame cost more than the tree evaluation itself.
+        X = np.array([[row[c] for c in feature_cols]], dtype=float)
+        X[np.isnan(X)] = 0.0
+        pred = max(0.0, float(model.predict_array(X)[0]))
+        preds[i] = pred
 
-        buf_qty.append(pred)
-        buf_dates.append(d)
+        buf_qty[n] = pred
+        if pred > 0:
+            last_nonzero = n
+        buf_days[n] = forecast_days[i]
+        n += 1
 
-    return np.array(preds)
+    return preds
@@ -34,12 +34,15 @@ def load_feedback_history(filepath: str = FEEDBACK_FILE) -> list:
 
 def save_feedback_history(history: list, filepath: str = FEEDBACK_FILE):
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    # Encode up front and hand the file one buffer: json.dump would issue a
+    # write() per token, which adds up on a multi-MB history.
+    payload = json.dumps(history, indent=2, default=str)
     # Write to temp file first, then rename to avoid corruption from Ctrl+C
     dir_name = os.path.dirname(filepath) or "."
     fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix=".tmp")
     try:
         with os.fdopen(fd, "w") as f:
-            json.dump(history, f, indent=2, default=str)
+            f.write(payload)
         os.replace(tmp_path, filepath)
     except BaseException:
         os.unlink(tmp_path)
@@ -125,20 +128,21 @@ def update_actuals(
 
     # Only set actual=0 for dates covered by the sales data, not future dates
     max_sales_date = actuals_df["date"].max()
+    # Total sales per (store, product, "YYYY-MM-DD") in one grouped pass, so
+    # each history entry is a dict lookup instead of a scan of actuals_df.
+    date_strs = actuals_df["date"].dt.strftime("%Y-%m-%d")
+    actual_totals = actuals_df.groupby(
+        [actuals_df["store"], actuals_df["product"], date_strs],
+        observed=True, sort=False,
+    )["qty"].sum().to_dict()
 
     updated = 0
     for entry in history:
-        entry_date = pd.Timestamp(entry["date"])
+        total = actual_totals.get((entry["store"], entry["product"], entry["date"]))
 
-        match = actuals_df[
-            (actuals_df["store"] == entry["store"]) &
-            (actuals_df["product"] == entry["product"]) &
-            (actuals_df["date"].dt.strftime("%Y-%m-%d") == entry["date"])
-        ]
-
-        if len(match) > 0:
-            new_actual = float(match["qty"].sum())
-        elif entry_date <= max_sales_date:
+        if total is not None:
+            new_actual = float(total)
+        elif pd.Timestamp(entry["date"]) <= max_sales_date:
             # Date is within sales data range but no record — means zero sold
             new_actual = 0.0
         else:
@@ -154,15 +158,18 @@ def update_actuals(
     return updated
 
 
-def compute_correction_factors(filepath: str = FEEDBACK_FILE) -> dict:
+def compute_correction_factors(filepath: str = FEEDBACK_FILE, history: list = None) -> dict:
     """
     Compute per-store-product correction factors based on historical forecast errors.
     Returns dict of (store, product) -> correction_multiplier.
 
     If model consistently over-forecasts by 20%, multiplier = 0.83
     If model consistently under-forecasts by 30%, multiplier = 1.30
+
+    Pass an already-loaded ``history`` to skip re-reading the JSON file.
     """
-    history = load_feedback_history(filepath)
+    if history is None:
+        history = load_feedback_history(filepath)
 
     # Only use entries where we have actuals
     completed = [h for h in history if h.get("actual") is not None and h["actual"] > 0]
@@ -200,9 +207,10 @@ def compute_correction_factors(filepath: str = FEEDBACK_FILE) -> dict:
     return corrections
 
 
-def generate_feedback_report(filepath: str = FEEDBACK_FILE) -> str:
+def generate_feedback_report(filepath: str = FEEDBACK_FILE, history: list = None) -> str:
     """Generate a report on forecast accuracy from the feedback loop."""
-    history = load_feedback_history(filepath)
+    if history is None:
+        history = load_feedback_history(filepath)
     completed = [h for h in history if h.get("actual") is not None]
 
     if not completed:
@@ -225,7 +233,7 @@ def generate_feedback_report(filepath: str = FEEDBACK_FILE) -> str:
     lines.append(f"    WMAPE:  {metrics['wmape']}%")
     lines.append(f"    Bias:   {metrics['bias']:+.2f}")
 
-    corrections = compute_correction_factors(filepath)
+    corrections = compute_correction_factors(filepath, history)
     if corrections:
         lines.append(f"\n  Correction Factors Applied:")
         for (store, product), factor in sorted(corrections.items()):
@@ -239,9 +247,11 @@ def generate_feedback_report(filepath: str = FEEDBACK_FILE) -> str:
 def export_feedback_to_excel(
     output_path: str = "output/feedback_report.xlsx",
     filepath: str = FEEDBACK_FILE,
+    history: list = None,
 ):
     """Export all feedback history to a formatted Excel workbook."""
-    history = load_feedback_history(filepath)
+    if history is None:
+        history = load_feedback_history(filepath)
     if not history:
         return None
 
@@ -284,6 +294,10 @@ def export_feedback_to_excel(
             tab_name = pd.Timestamp(date_str).strftime("%m-%d")
             day_df.to_excel(writer, sheet_name=tab_name, index=False)
 
+        # Correction factors depend only on the history file, so compute
+        # them once here rather than once per store-product in both tabs.
+        corrections = compute_correction_factors(filepath, history)
+
         # Final tab: Accuracy Summary across all dates
         summary_rows = []
         groups = {}
@@ -295,7 +309,6 @@ def export_feedback_to_excel(
             actuals_arr = np.array([e["actual"] for e in entries])
             predicted_arr = np.array([e["predicted"] for e in entries])
             metrics = compute_metrics(actuals_arr, predicted_arr)
-            corrections = compute_correction_factors(filepath)
             factor = corrections.get((store, product), 1.0)
             summary_rows.append({
                 "Store": store,
@@ -338,7 +351,6 @@ def export_feedback_to_excel(
             stability_score = max(0, (1 - min(cv, 2) / 2) * 100)
 
             # 4. Correction factor near 1.0 = model is well-calibrated
-            corrections = compute_correction_factors(filepath)
             factor = corrections.get((store, product), 1.0)
             calibration_score = max(0, (1 - abs(factor - 1.0)) * 100)
 
@@ -13,9 +13,33 @@ def _normalize_product(name: str) -> str:
     return PRODUCT_ALIASES.get(name, name)
 
 
+def _normalize_products(names: pd.Series) -> pd.Series:
+    """Apply _normalize_product once per distinct name, then broadcast."""
+    lookup = {name: _normalize_product(name) for name in names.unique()}
+    return names.map(lookup)
+
+
+def _parse_order_dates(dates: pd.Series) -> pd.Series:
+    """
+    Parse order dates, trying the M/D/YYYY export format first.
+
+    An explicit format keeps pandas on its vectorized strptime path;
+    only files with some other layout fall back to per-element
+    inference.
+    """
+    try:
+        return pd.to_datetime(dates, format="%m/%d/%Y", cache=True)
+    except (ValueError, TypeError):
+        return pd.to_datetime(dates, format="mixed")
+
+
 def load_sales_order_csv(filepath: str) -> pd.DataFrame:
     """Load the 'Gardena KTOWN Sales Order.csv' format."""
-    df = pd.read_csv(filepath, encoding="utf-8-sig")
+    df = pd.read_csv(
+        filepath,
+        encoding="utf-8-sig",
+        usecols=["CustomerName", "ProductDescription", "OrderDate", "OrderQuantity"],
+    )
     df = df.rename(columns={
         "CustomerName": "store",
         "ProductDescription": "product",
@@ -23,15 +47,19 @@ def load_sales_order_csv(filepath: str) -> pd.DataFrame:
         "OrderQuantity": "qty",
     })
     df = df[df["store"].isin(STORES)]
-    df["date"] = pd.to_datetime(df["date"], format="mixed")
+    df["date"] = _parse_order_dates(df["date"])
     df["qty"] = pd.to_numeric(df["qty"], errors="coerce").fillna(0)
-    df["product"] = df["product"].apply(_normalize_product)
+    df["product"] = _normalize_products(df["product"])
     return df[["store", "product", "date", "qty"]]
 
 
 def load_sales_enquiry_csv(filepath: str) -> pd.DataFrame:
     """Load the 'SalesEnquiryList.csv' format (has a title row to skip)."""
-    df = pd.read_csv(filepath, skiprows=1)
+    df = pd.read_csv(
+        filepath,
+        skiprows=1,
+        usecols=["Customer", "Product", "Order Date", "Quantity"],
+    )
     df = df.rename(columns={
         "Customer": "store",
         "Product": "product",
@@ -39,9 +67,9 @@ def load_sales_enquiry_csv(filepath: str) -> pd.DataFrame:
         "Quantity": "qty",
     })
     df = df[df["store"].isin(STORES)]
-    df["date"] = pd.to_datetime(df["date"], format="mixed")
+    df["date"] = _parse_order_dates(df["date"])
     df["qty"] = pd.to_numeric(df["qty"], errors="coerce").fillna(0)
-    df["product"] = df["product"].apply(_normalize_product)
+    df["product"] = _normalize_products(df["product"])
     return df[["store", "product", "date", "qty"]]
 
 
@@ -105,7 +133,7 @@ def build_daily_demand(df: pd.DataFrame) -> pd.DataFrame:
     with one row per store-product-date combination,
     and fills in zeros for missing days.
     """
-    daily = df.groupby(["store", "product", "date"])["qty"].sum().reset_index()
+    daily = df.groupby(["store", "product", "date"], observed=True)["qty"].sum().reset_index()
 
     # Build full date range
     min_date = daily["date"].min()
@@ -121,4 +149,6 @@ def build_daily_demand(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     daily = daily.set_index(["store", "product", "date"]).reindex(full_idx, fill_value=0.0).reset_index()
-    return daily
+    # A handful of stores/products repeated over every day: categorical codes
+    # make the per-(store, product) equality masks integer compares.
+    return daily.astype({"store": "category", "product": "category"})
@@ -5,11 +5,14 @@ Multiple approaches that get ensembled for robust predictions.
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import GradientBoostingRegressor, GradientBoostingClassifier
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 from config.products import FORECAST_CONFIG
 import warnings
 
+# sklearn and statsmodels are imported inside the models that use them:
+# together they cost ~2s at import time, which CLI paths that never fit a
+# model (--feedback-report, --update-actuals, --export-feedback) should
+# not pay.
+
 warnings.filterwarnings("ignore")
 
 
@@ -50,27 +53,30 @@ class DayOfWeekModel:
 
     def fit(self, series: pd.DataFrame):
         """Fit on a single store-product series (columns: date, qty)."""
-        s = series.sort_values("date").copy()
-        if s["qty"].sum() == 0:
+        s = series.sort_values("date")
+        qty = s["qty"]
+        if qty.sum() == 0:
             self.dow_avg = {i: 0.0 for i in range(7)}
             return self
 
-        # Weighted day-of-week averages (more recent = higher weight)
-        s["dow"] = s["date"].dt.dayofweek
-        s["days_ago"] = (s["date"].max() - s["date"]).dt.days
-        s["weight"] = self.decay_rate ** s["days_ago"]
+        # Weighted day-of-week averages (more recent = higher weight).
+        # Kept as local arrays rather than columns written onto the frame.
+        dow_arr = s["date"].dt.dayofweek.to_numpy()
+        days_ago = (s["date"].max() - s["date"]).dt.days.to_numpy()
+        weight = self.decay_rate ** days_ago
+        qty_arr = qty.to_numpy()
 
         for dow in range(7):
-            mask = s["dow"] == dow
-            if mask.sum() > 0:
-                self.dow_avg[dow] = np.average(s.loc[mask, "qty"], weights=s.loc[mask, "weight"])
+            mask = dow_arr == dow
+            if mask.any():
+                self.dow_avg[dow] = np.average(qty_arr[mask], weights=weight[mask])
             else:
                 self.dow_avg[dow] = 0.0
 
         # Trend: recent vs overall
-        recent = s[s["days_ago"] <= self.recent_days]
-        if len(recent) > 0 and s["qty"].mean() > 0:
-            self.trend = recent["qty"].mean() / s["qty"].mean()
+        recent = qty[days_ago <= self.recent_days]
+        if len(recent) > 0 and qty.mean() > 0:
+            self.trend = recent.mean() / qty.mean()
             self.trend = np.clip(self.trend, 0.3, 3.0)
 
         return self
@@ -104,6 +110,8 @@ class ExpSmoothingModel:
             self.fallback_value = s.mean() if len(s) > 0 else 0.0
             return self
 
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
         try:
             # Try Holt-Winters with weekly seasonality
             if len(s) >= 14:
@@ -166,6 +174,8 @@ class GBTModel:
     ]
 
     def __init__(self, recency_half_life: int = None):
+        from sklearn.ensemble import GradientBoostingRegressor
+
         self.model = GradientBoostingRegressor(
             loss=FORECAST_CONFIG["gbt_loss"],
             alpha=FORECAST_CONFIG["gbt_huber_alpha"],
@@ -200,7 +210,13 @@ class GBTModel:
         if not self.is_fitted:
             return np.zeros(len(feature_df))
 
-        X = feature_df[self.FEATURE_COLS].fillna(0).values
+        return self.predict_array(feature_df[self.FEATURE_COLS].fillna(0).values)
+
+    def predict_array(self, X: np.ndarray) -> np.ndarray:
+        """Predict from a NaN-free 2-D array whose columns follow FEATURE_COLS."""
+        if not self.is_fitted:
+            return np.zeros(len(X))
+
         preds = self.model.predict(X)
         return np.maximum(0, preds)
 
@@ -224,6 +240,8 @@ class SporadicModel:
     FEATURE_COLS = GBTModel.FEATURE_COLS  # reuse same features
 
     def __init__(self, recency_half_life: int = None):
+        from sklearn.ensemble import GradientBoostingRegressor, GradientBoostingClassifier
+
         self.classifier = GradientBoostingClassifier(
             n_estimators=50,
             max_depth=3,
@@ -281,7 +299,12 @@ class SporadicModel:
         if not self.is_fitted:
             return np.zeros(len(feature_df))
 
-        X = feature_df[self.FEATURE_COLS].fillna(0).values
+        return self.predict_array(feature_df[self.FEATURE_COLS].fillna(0).values)
+
+    def predict_array(self, X: np.ndarray) -> np.ndarray:
+        """Predict from a NaN-free 2-D array whose columns follow FEATURE_COLS."""
+        if not self.is_fitted:
+            return np.zeros(len(X))
 
         # Stage 1: probability of non-zero demand
         prob = self.classifier.predict_proba(X)[:, 1]
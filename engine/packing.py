@@ -45,21 +45,29 @@ def apply_safety_stock(
     """
     adjusted = {}
 
+    # Per store-product demand stats in one grouped pass, rather than a
+    # boolean filter of the full history for every prediction key.
+    keys = ["store", "product"]
+    stats = daily_demand.groupby(keys, observed=True)["qty"].agg(total="sum", days="size")
+    nonzero_qty = daily_demand.loc[daily_demand["qty"] > 0]
+    stats = stats.join(
+        nonzero_qty.groupby(keys, observed=True)["qty"].agg(nz_mean="mean", nz_std="std", nz_days="size")
+    ).fillna({"nz_days": 0})
+    stats = stats.to_dict("index")
+
     for (store, product), preds in predictions.items():
-        sp = daily_demand[
-            (daily_demand["store"] == store) & (daily_demand["product"] == product)
-        ]
+        st = stats.get((store, product))
 
-        if len(sp) == 0 or sp["qty"].sum() == 0:
+        if st is None or st["total"] == 0:
             adjusted[(store, product)] = preds
             continue
 
         # Compute variability
-        nonzero = sp[sp["qty"] > 0]["qty"]
-        cv = nonzero.std() / nonzero.mean() if len(nonzero) > 1 and nonzero.mean() > 0 else 0
+        nz_days = int(st["nz_days"])
+        cv = st["nz_std"] / st["nz_mean"] if nz_days > 1 and st["nz_mean"] > 0 else 0
 
         # Order frequency
-        order_freq = (sp["qty"] > 0).mean()
+        order_freq = nz_days / st["days"]
 
         adj_preds = preds.copy()
 
@@ -71,12 +79,10 @@ def apply_safety_stock(
 
         # Sporadic products: ensure a minimum on typical order days
         if product in SPORADIC_PRODUCTS and order_freq > 0.05:
-            avg_order_size = nonzero.mean() if len(nonzero) > 0 else 1
+            avg_order_size = st["nz_mean"] if nz_days > 0 else 1
             min_floor = max(1, round(avg_order_size * 0.5))
             # Apply floor on days that the model predicts > 0
-            for i in range(len(adj_preds)):
-                if adj_preds[i] > 0 and adj_preds[i] < min_floor:
-                    adj_preds[i] = min_floor
+            adj_preds[(adj_preds > 0) & (adj_preds < min_floor)] = min_floor
 
         adjusted[(store, product)] = adj_preds
 
@@ -99,12 +105,19 @@ def generate_packing_list_csv(
     os.makedirs(output_dir, exist_ok=True)
     filepaths = []
 
+    # Bucket predictions and par levels by store in one pass rather than
+    # rescanning every (store, product) key for each store.
+    preds_by_store = defaultdict(list)
+    for (s, product), preds in predictions.items():
+        preds_by_store[s].append((product, preds))
+    par_by_store = defaultdict(list)
+    for (s, product), par in (par_levels or {}).items():
+        par_by_store[s].append((product, par))
+
     for store in stores:
         # Collect products with predicted demand >= 1
         store_products = {}
-        for (s, product), preds in predictions.items():
-            if s != store:
-                continue
+        for product, preds in preds_by_store[store]:
             rounded = np.round(preds).astype(int)
             total = rounded.sum()
             if total >= 1:
@@ -114,8 +127,8 @@ def generate_packing_list_csv(
         check_stock = []
         if par_levels:
             predicted_products = set(store_products.keys())
-            for (s, product), par in par_levels.items():
-                if s == store and par > 0 and product not in predicted_products:
+            for product, par in par_by_store[store]:
+                if par > 0 and product not in predicted_products:
                     check_stock.append((product, par))
             check_stock.sort(key=lambda x: x[0])
 
@@ -148,10 +161,8 @@ def generate_packing_list_csv(
                     daily_vals = rounded
                 capped_total = daily_vals.sum()
 
-                row = [product]
-                for i, val in enumerate(daily_vals):
-                    grand_total_by_day[i] += val
-                    row.append(val if val > 0 else "")
+                grand_total_by_day += daily_vals
+                row = [product] + [val if val > 0 else "" for val in daily_vals.tolist()]
                 row.append(int(capped_total))
                 if show_par:
                     row.append(par if par is not None else "")
@@ -207,10 +218,12 @@ def print_packing_list(
 
     sorted_products = sorted(store_products.items(), key=lambda x: x[1][1], reverse=True)
 
-    print(f"\n{'=' * 80}")
-    print(f"  STORE: {store}")
-    print(f"  Period: {dates[0].strftime('%m/%d/%Y')} - {dates[-1].strftime('%m/%d/%Y')}")
-    print(f"{'=' * 80}")
+    # Build the whole list and write it once instead of one print per line
+    out = []
+    out.append(f"\n{'=' * 80}")
+    out.append(f"  STORE: {store}")
+    out.append(f"  Period: {dates[0].strftime('%m/%d/%Y')} - {dates[-1].strftime('%m/%d/%Y')}")
+    out.append(f"{'=' * 80}")
 
     show_par = par_levels is not None
     header = f"  {'Product':<28}"
@@ -219,8 +232,8 @@ def print_packing_list(
     header += f"{'TOTAL':>8}"
     if show_par:
         header += f"{'MAX':>6}"
-    print(header)
-    print("  " + "-" * (28 + 7 * len(dates) + 8 + (6 if show_par else 0)))
+    out.append(header)
+    out.append("  " + "-" * (28 + 7 * len(dates) + 8 + (6 if show_par else 0)))
 
     grand_total_by_day = np.zeros(len(dates))
 
@@ -234,9 +247,9 @@ def print_packing_list(
             daily_vals = rounded
         capped_total = daily_vals.sum()
 
+        grand_total_by_day += daily_vals
         line = f"  {product:<28}"
-        for i, val in enumerate(daily_vals):
-            grand_total_by_day[i] += val
+        for val in daily_vals:
             if val > 0:
                 line += f"{val:>7}"
             else:
@@ -244,18 +257,20 @@ def print_packing_list(
         line += f"{capped_total:>8}"
         if show_par:
             line += f"{(par if par is not None else ''):>6}"
-        print(line)
+        out.append(line)
 
-    print("  " + "-" * (28 + 7 * len(dates) + 8 + (6 if show_par else 0)))
+    out.append("  " + "-" * (28 + 7 * len(dates) + 8 + (6 if show_par else 0)))
     totals_line = f"  {'DAILY TOTAL':<28}"
     for v in grand_total_by_day:
         totals_line += f"{int(v):>7}"
     totals_line += f"{int(grand_total_by_day.sum()):>8}"
-    print(totals_line)
+    out.append(totals_line)
 
     # Check stock section
     if check_stock:
-        print(f"\n  CHECK STOCK — no demand predicted, verify on hand:")
-        print("  " + "-" * 50)
+        out.append(f"\n  CHECK STOCK — no demand predicted, verify on hand:")
+        out.append("  " + "-" * 50)
         for product, par in check_stock:
-            print(f"  {product:<28}  (max: {par})")
+            out.append(f"  {product:<28}  (max: {par})")
+
+    print("\n".join(out))
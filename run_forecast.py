@@ -13,21 +13,28 @@ Usage:
 
 import sys
 import os
+import json
 import argparse
+import heapq
 import numpy as np
 import pandas as pd
+from collections import Counter
 from datetime import timedelta
 
 # Ensure project root is on path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from engine.ingest import load_all_data, build_daily_demand
-from engine.features import build_feature_matrix, build_future_features, predict_gbt_recursive, get_tier_map
+from engine.features import (
+    build_feature_matrix, build_future_features, predict_gbt_recursive, get_tier_map, store_product_mask,
+    group_by_store_product,
+)
 from engine.models import DayOfWeekModel, ExpSmoothingModel, GBTModel, SporadicModel, EnsembleForecaster
 from engine.backtest import walk_forward_backtest, evaluate_models, evaluate_models_per_product, generate_accuracy_report
 from engine.feedback import (
     compute_correction_factors, record_forecasts_batch, update_actuals,
     generate_feedback_report, export_feedback_to_excel,
+    load_feedback_history, save_feedback_history,
 )
 from engine.packing import apply_safety_stock, generate_packing_list_csv, print_packing_list, load_par_levels
 from engine.router import classify_lane, predict_intermittent, predict_periodic, ROUTING_WINDOW, _get_demand_window
@@ -55,6 +62,22 @@ def run_backtest(data_dir: str = "."):
     return weights
 
 
+def _train_store_models(store_daily: pd.DataFrame, sporadic_pairs: set):
+    """Fit one store's GBT and sporadic models; either is None if too few rows."""
+    gbt = None
+    if len(store_daily) >= 20:
+        gbt = GBTModel()
+        gbt.fit(store_daily)
+
+    sporadic = None
+    store_sporadic = store_daily[store_product_mask(store_daily, sporadic_pairs)]
+    if len(store_sporadic) >= 20:
+        sporadic = SporadicModel()
+        sporadic.fit(store_sporadic)
+
+    return gbt, sporadic
+
+
 def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "output"):
     """Run the full forecasting pipeline."""
     print("\n" + "=" * 70)
@@ -65,9 +88,12 @@ def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "out
     print("\n[1/6] Loading data...")
     raw = load_all_data(data_dir)
     print(f"  Total records: {len(raw)}")
-    print(f"  Date range: {raw['date'].min().strftime('%m/%d/%Y')} - {raw['date'].max().strftime('%m/%d/%Y')}")
+    # load_all_data returns rows sorted by date, so the ends are the range —
+    # no need for separate min/max scans over the column.
+    first_date, last_date = raw["date"].iloc[0], raw["date"].iloc[-1]
+    print(f"  Date range: {first_date.strftime('%m/%d/%Y')} - {last_date.strftime('%m/%d/%Y')}")
     print(f"  Stores: {', '.join(sorted(raw['store'].unique()))}")
-    print(f"  Products: {len(raw['product'].unique())}")
+    print(f"  Products: {raw['product'].nunique()}")
 
     # --- Step 2: Build daily demand ---
     print("\n[2/6] Building daily demand matrix...")
@@ -104,11 +130,15 @@ def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "out
     # GBT and SporadicModel should only train on rows they actually serve in
     # production (daily-lane items), preventing intermittent/periodic behavior
     # from leaking into the ML model used exclusively for Lane 1.
+    # Split the demand history by item once; the loops below look pairs up.
+    sp_by_pair = group_by_store_product(daily)
+    no_demand = daily.iloc[:0]
+
     lane_map = {}
     lane_counts = {"daily": 0, "periodic": 0, "intermittent": 0, "dormant": 0}
     for store in stores:
         for product in products:
-            sp_demand = daily[(daily["store"] == store) & (daily["product"] == product)]
+            sp_demand = sp_by_pair.get((store, product), no_demand)
             lane = classify_lane(product, sp_demand)
             lane_map[(store, product)] = lane
             lane_counts[lane] += 1
@@ -116,34 +146,34 @@ def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "out
     # Filter feature matrix to daily-lane rows only for GBT/sporadic training.
     # Train one model per store — captures store-specific demand patterns.
     daily_lane_pairs = {k for k, v in lane_map.items() if v == "daily"}
-    gbt_per_store = {}
-    sporadic_per_store = {}
-    total_gbt_rows = 0
-
+    sporadic_pairs = {k for k, t in tier_map.items() if t == "sporadic"}
+    store_frames = {}
     for store in stores:
         store_pairs = {(s, p) for (s, p) in daily_lane_pairs if s == store}
-        if not store_pairs:
-            continue
+        if store_pairs:
+            store_frames[store] = features[store_product_mask(features, store_pairs)]
+
+    store_models = {
+        store: _train_store_models(store_daily, sporadic_pairs)
+        for store, store_daily in store_frames.items()
+    }
 
-        store_daily = features[
-            features.apply(lambda r, _p=store_pairs: (r["store"], r["product"]) in _p, axis=1)
-        ]
-        if len(store_daily) >= 20:
-            gbt_s = GBTModel()
-            gbt_s.fit(store_daily)
+    gbt_per_store = {}
+    sporadic_per_store = {}
+    total_gbt_rows = 0
+    for store, (gbt_s, spo_s) in store_models.items():
+        if gbt_s is not None:
             gbt_per_store[store] = gbt_s
-            total_gbt_rows += len(store_daily)
-
-        store_sporadic = store_daily[store_daily.apply(
-            lambda r: tier_map.get((r["store"], r["product"]), "low") == "sporadic", axis=1
-        )]
-        if len(store_sporadic) >= 20:
-            spo_s = SporadicModel()
-            spo_s.fit(store_sporadic)
+            total_gbt_rows += len(store_frames[store])
+        if spo_s is not None:
             sporadic_per_store[store] = spo_s
 
     print(f"  Per-store GBT trained: {', '.join(gbt_per_store)} ({total_gbt_rows} total daily-lane rows)")
-    sporadic_counts = {s: sum(1 for (st, p) in daily_lane_pairs if st == s and tier_map.get((st, p), "low") == "sporadic") for s in sporadic_per_store}
+    # Count sporadic daily-lane items per store in one pass over the pairs
+    sporadic_by_store = Counter(
+        st for (st, p) in daily_lane_pairs if tier_map.get((st, p), "low") == "sporadic"
+    )
+    sporadic_counts = {s: sporadic_by_store[s] for s in sporadic_per_store}
     if sporadic_per_store:
         print(f"  Per-store sporadic model trained: {', '.join(f'{s}({n})' for s, n in sporadic_counts.items())}")
 
@@ -155,9 +185,7 @@ def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "out
 
     for store in stores:
         for product in products:
-            sp_demand = daily[
-                (daily["store"] == store) & (daily["product"] == product)
-            ]
+            sp_demand = sp_by_pair.get((store, product), no_demand)
             tier = tier_map.get((store, product), "low")
             lane = lane_map[(store, product)]
 
@@ -236,10 +264,12 @@ def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "out
         predictions[key] = np.round(predictions[key]).astype(int)
 
     # Record forecasts for feedback loop BEFORE consolidation (daily granularity for accurate matching)
+    # Format the horizon dates once; they are the same for every item.
+    date_strs = [d.strftime("%Y-%m-%d") for d in forecast_dates]
     forecast_entries = []
     for (store, product), preds in predictions.items():
-        for i, d in enumerate(forecast_dates):
-            forecast_entries.append((store, product, d.strftime("%Y-%m-%d"), int(preds[i])))
+        for date_str, qty in zip(date_strs, preds.tolist()):
+            forecast_entries.append((store, product, date_str, int(qty)))
     record_forecasts_batch(forecast_entries, metadata=forecast_meta)
 
     # Schedule intermittent/periodic deliveries at the item's natural reorder interval.
@@ -252,7 +282,7 @@ def run_forecast(data_dir: str = ".", num_days: int = 14, output_dir: str = "out
         key = (store, product)
         meta = forecast_meta.get(key, {})
         if meta.get("model") in ("intermittent_v1", "periodic_v1"):
-            sp = daily[(daily["store"] == store) & (daily["product"] == product)]
+            sp = sp_by_pair.get(key, no_demand)
             recent = _get_demand_window(sp)   # use same adaptive window as predict_intermittent
             nonzero = recent[recent["qty"] > 0]["qty"]
             n_order = len(nonzero)
@@ -308,16 +338,18 @@ def run_update_actuals(data_dir: str = "."):
     """Update feedback loop with actual sales data."""
     print("\n[1/2] Loading actual sales data...")
     raw = load_all_data(data_dir)
-    daily = raw.groupby(["store", "product", "date"])["qty"].sum().reset_index()
+    daily = raw.groupby(["store", "product", "date"], observed=True)["qty"].sum().reset_index()
 
     print(f"\n[2/2] Matching actuals against recorded forecasts...")
     updated = update_actuals(daily)
     print(f"  Updated {updated} forecast entries with actual data.")
 
-    report = generate_feedback_report()
+    # Report and export both read the history update_actuals just saved
+    history = load_feedback_history()
+    report = generate_feedback_report(history=history)
     print(report)
 
-    result = export_feedback_to_excel(output_path="output/feedback_report.xlsx")
+    result = export_feedback_to_excel(output_path="output/feedback_report.xlsx", history=history)
     if result:
         print(f"\n  Excel report saved to: {result}")
 
@@ -332,7 +364,6 @@ def run_seed_feedback(excel_path: str = "output/feedback_report.xlsx"):
     This is a one-time setup step — run it whenever forecast_history.json
     is missing or you want to re-seed from the Excel actuals.
     """
-    import json
     import openpyxl
 
     if not os.path.exists(excel_path):
@@ -378,11 +409,10 @@ def run_seed_feedback(excel_path: str = "output/feedback_report.xlsx"):
 
     print(f"  Seeded {len(history)} entries into {feedback_path}")
 
-    from engine.feedback import compute_correction_factors
-    corrections = compute_correction_factors()
+    corrections = compute_correction_factors(history=history)
     active = {k: v for k, v in corrections.items() if v != 1.0}
     print(f"  Correction factors active: {len(active)} products")
-    for (store, product), factor in sorted(active.items(), key=lambda x: abs(x[1] - 1), reverse=True)[:10]:
+    for (store, product), factor in heapq.nlargest(10, active.items(), key=lambda x: abs(x[1] - 1)):
         direction = "scale down" if factor < 1 else "scale up"
         print(f"    {store} / {product}: x{factor} ({direction})")
 
@@ -396,12 +426,11 @@ def run_backfill_feedback(data_dir: str = "."):
     CSV files. Runs the ensemble model trained on data *before* each gap date so
     predictions represent what the model would have made at that time.
     """
-    from engine.feedback import load_feedback_history, save_feedback_history
-
     print("\n[1/4] Loading data...")
     raw = load_all_data(data_dir)
     daily = build_daily_demand(raw)
-    print(f"  Date range: {daily['date'].min().date()} to {daily['date'].max().date()}")
+    # Same span as the date-sorted raw frame; read it off the ends.
+    print(f"  Date range: {raw['date'].iloc[0].date()} to {raw['date'].iloc[-1].date()}")
 
     # Find the last date already covered by predictions, then only fill forward from there
     history = load_feedback_history()
@@ -416,16 +445,20 @@ def run_backfill_feedback(data_dir: str = "."):
     else:
         gap_start = daily["date"].min()
 
-    actuals_by_date = daily.groupby(["store", "product", "date"])["qty"].sum().reset_index()
+    actuals_by_date = daily.groupby(["store", "product", "date"], observed=True)["qty"].sum().reset_index()
     actuals_by_date["date_str"] = actuals_by_date["date"].dt.strftime("%Y-%m-%d")
 
-    # Only look at dates after the last covered prediction
-    missing = actuals_by_date[
-        (actuals_by_date["date"] >= gap_start) &
-        ~actuals_by_date.apply(
-            lambda r: (r["store"], r["product"], r["date_str"]) in covered_dates, axis=1
-        )
-    ]
+    # Only look at dates after the last covered prediction — build one mask
+    # over plain arrays instead of a row-wise apply, then slice once.
+    already_covered = np.fromiter(
+        (k in covered_dates for k in zip(
+            actuals_by_date["store"], actuals_by_date["product"], actuals_by_date["date_str"]
+        )),
+        dtype=bool,
+        count=len(actuals_by_date),
+    )
+    mask = (actuals_by_date["date"] >= gap_start).to_numpy() & ~already_covered
+    missing = actuals_by_date[mask]
 
     if missing.empty:
         print("  No gaps found — forecast_history.json is fully caught up.")
@@ -437,12 +470,12 @@ def run_backfill_feedback(data_dir: str = "."):
 
     # Build ensemble weights once using all data (backfill is retrospective — ok to use all data)
     print("\n[3/4] Computing ensemble weights...")
-    backfill_features = build_feature_matrix(daily)
-    bt_results = walk_forward_backtest(daily, features_df=backfill_features, test_days=14)
+    # Same input as the GBT training matrix below — build it once and reuse.
+    features_all = build_feature_matrix(daily)
+    bt_results = walk_forward_backtest(daily, features_df=features_all, test_days=14)
     weights = evaluate_models(bt_results)
     print(f"  Weights: DOW={weights['dow']:.0%}, Exp={weights['exp']:.0%}, GBT={weights['gbt']:.0%}")
 
-    features_all = build_feature_matrix(daily)
     tier_map = get_tier_map(daily)
 
     # Train GBT and SporadicModel on all data (retrospective — no look-ahead issue for backfill)
@@ -450,9 +483,8 @@ def run_backfill_feedback(data_dir: str = "."):
     gbt.fit(features_all)
 
     sporadic_model = SporadicModel()
-    sporadic_features = features_all[features_all.apply(
-        lambda r: tier_map.get((r["store"], r["product"]), "low") == "sporadic", axis=1
-    )]
+    sporadic_pairs = {k for k, t in tier_map.items() if t == "sporadic"}
+    sporadic_features = features_all[store_product_mask(features_all, sporadic_pairs)]
     if len(sporadic_features) >= 20:
         sporadic_model.fit(sporadic_features)
 
@@ -466,12 +498,19 @@ def run_backfill_feedback(data_dir: str = "."):
     training_cutoff = pd.Timestamp(gap_dates[0])
     train_data = daily[daily["date"] < training_cutoff]
 
+    # Split history by item once instead of filtering per store/product
+    train_by_pair = group_by_store_product(train_data)
+    sp_by_pair = group_by_store_product(daily)
+    no_demand = daily.iloc[:0]
+    missing_qty = dict(zip(
+        zip(missing["store"], missing["product"], missing["date_str"]),
+        missing["qty"],
+    ))
+
     per_product_models = {}
     for store in stores:
         for product in products:
-            sp_train = train_data[
-                (train_data["store"] == store) & (train_data["product"] == product)
-            ]
+            sp_train = train_by_pair.get((store, product), no_demand)
             if len(sp_train) < 7:
                 continue
             dow_model = DayOfWeekModel()
@@ -482,9 +521,7 @@ def run_backfill_feedback(data_dir: str = "."):
 
     for store in stores:
         for product in products:
-            sp_demand = daily[
-                (daily["store"] == store) & (daily["product"] == product)
-            ]
+            sp_demand = sp_by_pair.get((store, product), no_demand)
             lane = classify_lane(product, sp_demand)
             tier = tier_map.get((store, product), "low")
             models = per_product_models.get((store, product))
@@ -493,15 +530,11 @@ def run_backfill_feedback(data_dir: str = "."):
                 if (store, product, gap_date_str) in covered_dates:
                     continue
 
-                actual_row = missing[
-                    (missing["store"] == store) &
-                    (missing["product"] == product) &
-                    (missing["date_str"] == gap_date_str)
-                ]
-                if actual_row.empty:
+                actual_qty = missing_qty.get((store, product, gap_date_str))
+                if actual_qty is None:
                     continue
 
-                actual_qty = float(actual_row["qty"].iloc[0])
+                actual_qty = float(actual_qty)
                 gap_date = pd.Timestamp(gap_date_str)
                 forecast_dates = pd.DatetimeIndex([gap_date])
 
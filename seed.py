@@ -20,6 +20,7 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta, timezone
 
 import openpyxl
+from sqlalchemy import insert
 
 from warehouse_app import create_app
 from warehouse_app.extensions import db
@@ -223,7 +224,9 @@ def seed():
         InventoryItem.query.delete()
         Store.query.delete()
         User.query.delete()
-        db.session.commit()
+        # No commit here: clearing and reseeding are one transaction, so a
+        # failure part-way leaves the previous data in place.
+        db.session.flush()
 
         # ── Users ──────────────────────────────────────────────
         admin_pw = os.environ.get('SEED_ADMIN_PASSWORD', 'admin123')
@@ -236,7 +239,8 @@ def seed():
         warehouse_user = User(full_name='Warehouse Worker', email='warehouse@yeems.com', role='warehouse', active=True)
         warehouse_user.set_password(warehouse_pw)
 
-        db.session.add_all([admin, warehouse_user])
+        users = [admin, warehouse_user]
+        db.session.add_all(users)
         db.session.flush()
 
         # ── Stores ─────────────────────────────────────────────
@@ -307,46 +311,47 @@ def seed():
         for store_code, product, order_date, qty in all_rows:
             daily_agg[(store_code, product, order_date)] += qty
 
-        usage_count = 0
+        usage_rows = []
         for (store_code, product, usage_date), total_qty in daily_agg.items():
             store = store_objs.get(store_code)
             item = item_objs.get(product)
             if not store or not item:
                 continue
 
-            db.session.add(DailyUsage(
-                store_id=store.id,
-                item_id=item.id,
-                usage_date=usage_date,
-                quantity_used=total_qty,
-                source='sales_order_csv',
-            ))
-            usage_count += 1
-
-        db.session.flush()
+            usage_rows.append({
+                'store_id': store.id,
+                'item_id': item.id,
+                'usage_date': usage_date,
+                'quantity_used': total_qty,
+                'source': 'sales_order_csv',
+            })
+
+        # One executemany INSERT instead of an ORM object per row
+        if usage_rows:
+            db.session.execute(insert(DailyUsage), usage_rows)
+        usage_count = len(usage_rows)
         print(f"  Created {usage_count} daily usage records")
 
         # ── Store Item Settings (par levels) ──────────────────
         print("Creating store item settings with par levels...")
-        settings_count = 0
+        setting_rows = []
         # Create settings for every store-item combo
         for name, item in item_objs.items():
             for code, store in store_objs.items():
-                par = par_levels.get((code, name), 0)
-                setting = StoreItemSetting(
-                    store_id=store.id,
-                    item_id=item.id,
-                    par_level=par,
-                    safety_stock=0,
-                    reorder_threshold=0,
-                    min_send_quantity=0,
-                    rounding_rule='none',
-                    active=True,
-                )
-                db.session.add(setting)
-                settings_count += 1
-
-        db.session.flush()
+                setting_rows.append({
+                    'store_id': store.id,
+                    'item_id': item.id,
+                    'par_level': par_levels.get((code, name), 0),
+                    'safety_stock': 0,
+                    'reorder_threshold': 0,
+                    'min_send_quantity': 0,
+                    'rounding_rule': 'none',
+                    'active': True,
+                })
+
+        if setting_rows:
+            db.session.execute(insert(StoreItemSetting), setting_rows)
+        settings_count = len(setting_rows)
         print(f"  Created {settings_count} store item settings")
 
         # ── Summary of par levels ─────────────────────────────
@@ -379,11 +384,12 @@ def seed():
         db.session.commit()
 
         print(f"\nSeed complete!")
-        print(f"  Users: {User.query.count()}")
-        print(f"  Stores: {Store.query.count()}")
-        print(f"  Items: {InventoryItem.query.count()}")
-        print(f"  Store Item Settings: {StoreItemSetting.query.count()}")
-        print(f"  Daily Usage Records: {DailyUsage.query.count()}")
+        # Tables were cleared above, so the counts are exactly what was created
+        print(f"  Users: {len(users)}")
+        print(f"  Stores: {len(store_objs)}")
+        print(f"  Items: {len(item_objs)}")
+        print(f"  Store Item Settings: {settings_count}")
+        print(f"  Daily Usage Records: {usage_count}")
         print(f"\nLogin credentials:")
         print(f"  Admin: admin@yeems.com / {admin_pw}")
         print(f"  Warehouse: warehouse@yeems.com / {warehouse_pw}")
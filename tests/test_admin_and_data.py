@@ -161,3 +161,16 @@ class TestDataEntry:
     def test_warehouse_user_denied(self, warehouse_client, db):
         resp = warehouse_client.get('/data/daily-usage')
         assert resp.status_code == 403
+
+    def test_prediction_accuracy_page(self, admin_client, sample_plan, db):
+        from warehouse_app.models.actual_order import ActualOrder
+        from warehouse_app.models.replenishment_plan_line import ReplenishmentPlanLine
+        line = ReplenishmentPlanLine.query.filter_by(plan_id=sample_plan.id).first()
+        db.session.add(ActualOrder(store_id=line.store_id, item_id=line.item_id,
+                                   order_date=sample_plan.plan_date, quantity_ordered=3))
+        db.session.commit()
+        resp = admin_client.get(
+            f'/data/prediction-accuracy?plan_date={sample_plan.plan_date.isoformat()}')
+        assert resp.status_code == 200
+        assert line.item.item_name.encode() in resp.data
+        assert b'WMAPE' in resp.data
@@ -59,6 +59,39 @@ class TestCSVValidationHardening:
         assert result['skipped'] == 1
         assert any('Future date' in e for e in result['errors'])
 
+    def test_upsert_updates_existing_and_repeated_rows(self, db, sample_stores, sample_items):
+        from warehouse_app.models.daily_usage import DailyUsage
+        day = date.today().isoformat()
+        import_daily_usage_csv(f'store_code,sku,usage_date,quantity_used\nGARDENA,MILK-WHL,{day},5\n')
+        csv_data = (
+            'store_code,sku,usage_date,quantity_used\n'
+            f'GARDENA,MILK-WHL,{day},7\n'
+            f'KTOWN,MILK-WHL,{day},2\n'
+            f'KTOWN,MILK-WHL,{day},3\n'
+        )
+        result = import_daily_usage_csv(csv_data)
+        assert result['imported'] == 3
+        rows = DailyUsage.query.filter_by(usage_date=date.today()).all()
+        assert sorted(r.quantity_used for r in rows) == [3, 7]
+
+    def test_save_failure_reported_not_raised(self, db, sample_stores, sample_items, monkeypatch):
+        from sqlalchemy.exc import OperationalError
+        from warehouse_app.models.daily_usage import DailyUsage
+        from warehouse_app.services import csv_import
+
+        def failing_upsert(*args, **kwargs):
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+        monkeypatch.setattr(csv_import, '_upsert_rows', failing_upsert)
+        day = date.today().isoformat()
+        result = import_daily_usage_csv(
+            f'store_code,sku,usage_date,quantity_used\nGARDENA,MILK-WHL,{day},5\n'
+        )
+        assert result['imported'] == 0
+        assert result['skipped'] == 1
+        assert any('Could not save imported rows' in e for e in result['errors'])
+        assert DailyUsage.query.count() == 0
+
 
 class TestAPIValidationHardening:
     def test_line_id_must_be_integer(self, admin_client, db):
@@ -94,6 +127,16 @@ class TestActivityLogScreen:
         assert resp.status_code == 200
         assert b'No plan found' in resp.data
 
+    def test_activity_log_lists_plan_line_changes(self, admin_client, sample_plan, db):
+        line = ReplenishmentPlanLine.query.filter_by(plan_id=sample_plan.id).first()
+        admin_client.post('/warehouse/api/update-line',
+                          json={'line_id': line.id, 'status': 'picked'})
+
+        today = date.today().isoformat()
+        resp = admin_client.get(f'/warehouse/activity?plan_date={today}')
+        assert resp.status_code == 200
+        assert b'status: pending -&gt; picked' in resp.data
+
 
 class TestPlanGenerationSafeguards:
     def test_no_active_settings_error(self, db, sample_stores, sample_items):
@@ -102,6 +145,19 @@ class TestPlanGenerationSafeguards:
         with pytest.raises(ValueError, match='No active store-item settings'):
             generate_plan(date.today(), user_id=None)
 
+    def test_existing_plan_error_takes_precedence(self, db, sample_plan):
+        """A non-draft plan is reported as such even with no active settings left."""
+        import pytest
+        from warehouse_app.models.store_item_setting import StoreItemSetting
+        from warehouse_app.services.plan_generation import generate_plan
+        sample_plan.status = 'in_progress'
+        StoreItemSetting.query.update({'active': False})
+        db.session.commit()
+        with pytest.raises(ValueError, match='Cannot regenerate a plan with status "in_progress"'):
+            generate_plan(date.today(), user_id=None, regenerate=True)
+        with pytest.raises(ValueError, match='A plan already exists'):
+            generate_plan(date.today(), user_id=None)
+
     def test_regenerate_confirmation_flow(self, admin_client, sample_plan):
         """Regenerating a draft plan should show a confirmation page first."""
         today = date.today().isoformat()
@@ -111,6 +167,17 @@ class TestPlanGenerationSafeguards:
         assert resp.status_code == 200
         assert b'Confirm Regenerate' in resp.data
 
+    def test_regenerate_logs_replaced_line_count(self, db, sample_plan):
+        from warehouse_app.services.plan_generation import generate_plan
+        line_count = ReplenishmentPlanLine.query.filter_by(plan_id=sample_plan.id).count()
+        old_plan_id = sample_plan.id
+        generate_plan(date.today(), user_id=None, regenerate=True)
+
+        entry = AuditLog.query.filter_by(
+            entity_type='plan', entity_id=old_plan_id, action='regenerate',
+        ).one()
+        assert entry.old_value.endswith(f'lines={line_count}')
+
 
 class TestDeliverySheetProgress:
     def test_progress_bar_in_delivery(self, admin_client, sample_plan, sample_stores):
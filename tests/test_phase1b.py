@@ -26,6 +26,9 @@ class TestConfigConstants:
     def test_config_has_confidence_threshold(self, app):
         assert app.config['MIN_DATA_POINTS_HIGH_CONFIDENCE'] == 5
 
+    def test_config_enables_pool_pre_ping(self, app):
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_pre_ping'] is True
+
 
 class TestNewModelFields:
     def test_user_last_login(self, db):
@@ -67,6 +67,30 @@ class TestCSVImportHardening:
         assert result['imported'] == 3
         assert any('limit' in e.lower() for e in result['errors'])
 
+    @pytest.mark.parametrize('value', [
+        '2024-01-05', '2024-1-5', '1/5/2024', '01/05/2024', '1-5-2024',
+        '01/ 5/2024', '2024-01- 5', '  1/5/2024  ', '01/ 05/2024',
+        '2024- 1-05', '13/01/2024', '02/30/2024', '00/10/2024', '1/5/24',
+        '2024/01/05', '001/5/2024', '',
+    ])
+    def test_parse_date_matches_strptime(self, value):
+        """The regex date parser accepts exactly what the strptime formats did."""
+        from datetime import datetime
+        from warehouse_app.services.csv_import import _parse_date
+        expected = None
+        for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%m-%d-%Y'):
+            try:
+                expected = datetime.strptime(value.strip(), fmt).date()
+                break
+            except ValueError:
+                continue
+        assert _parse_date(value) == expected
+
+    @pytest.mark.parametrize('value', ['１/５/2024', '1/5/２０２４', '２０２４-01-05'])
+    def test_parse_date_rejects_non_ascii_digits(self, value):
+        from warehouse_app.services.csv_import import _parse_date
+        assert _parse_date(value) is None
+
 
 # ── Warehouse API status validation ──────────────────────────────────
 
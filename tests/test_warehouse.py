@@ -1,6 +1,8 @@
 """Tests for the warehouse screens: pick list, delivery sheet, exceptions."""
 from datetime import date
 
+from warehouse_app.models.replenishment_plan_line import ReplenishmentPlanLine
+
 
 class TestMasterPickList:
     def test_unauthenticated_redirect(self, client):
@@ -39,6 +41,16 @@ class TestMasterPickList:
         resp = warehouse_client.get(f'/warehouse/pick-list?plan_date={today}')
         assert resp.status_code == 200
 
+    def test_status_summary_counts(self, admin_client, sample_plan):
+        line = ReplenishmentPlanLine.query.filter_by(plan_id=sample_plan.id).first()
+        admin_client.post('/warehouse/api/update-line',
+                          json={'line_id': line.id, 'status': 'picked'})
+
+        today = date.today().isoformat()
+        resp = admin_client.get(f'/warehouse/pick-list?plan_date={today}')
+        assert resp.status_code == 200
+        assert b'1 pick' in resp.data
+
 
 class TestStoreDeliverySheet:
     def test_unauthenticated_redirect(self, client):
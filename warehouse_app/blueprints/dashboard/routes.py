@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 
 from flask import render_template, request
 from flask_login import login_required
@@ -17,7 +17,6 @@ def index():
     plan_date_str = request.args.get('plan_date')
     if plan_date_str:
         try:
-            from datetime import datetime
             plan_date = datetime.strptime(plan_date_str, '%Y-%m-%d').date()
         except ValueError:
             plan_date = date.today()
@@ -56,19 +55,14 @@ def index():
             if key in stats:
                 stats[key] = count
 
-        store_count = db.session.query(
-            func.count(func.distinct(ReplenishmentPlanLine.store_id))
-        ).filter(ReplenishmentPlanLine.plan_id == plan.id).scalar()
-        stats['total_stores'] = store_count
-
-    # Get stores for delivery sheet links
+    # Get stores for delivery sheet links. The plan's distinct store ids are
+    # resolved once, in the database, and also give the store count.
     stores = []
     if plan:
-        store_ids = db.session.query(
-            func.distinct(ReplenishmentPlanLine.store_id)
-        ).filter(ReplenishmentPlanLine.plan_id == plan.id).all()
-        store_ids = [s[0] for s in store_ids]
-        if store_ids:
-            stores = Store.query.filter(Store.id.in_(store_ids)).order_by(Store.name).all()
+        plan_store_ids = db.session.query(
+            ReplenishmentPlanLine.store_id
+        ).filter(ReplenishmentPlanLine.plan_id == plan.id).distinct().scalar_subquery()
+        stores = Store.query.filter(Store.id.in_(plan_store_ids)).order_by(Store.name).all()
+        stats['total_stores'] = len(stores)
 
     return render_template('dashboard/index.html', stats=stats, plan=plan, stores=stores)
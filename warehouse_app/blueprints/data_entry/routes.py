@@ -4,6 +4,7 @@ from datetime import datetime, date
 from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 
 from warehouse_app.blueprints.data_entry import data_entry_bp
 from warehouse_app.auth_helpers import admin_required
@@ -290,15 +291,26 @@ def prediction_accuracy():
     }
 
     if plan:
-        lines = ReplenishmentPlanLine.query.filter_by(plan_id=plan.id).all()
-
-        for line in lines:
-            actual = ActualOrder.query.filter_by(
-                store_id=line.store_id,
-                item_id=line.item_id,
-                order_date=plan_date,
-            ).first()
-
+        # One LEFT JOIN against the day's actual orders (unique per
+        # store/item/date) instead of a lookup per line; store and item are
+        # eager-loaded for the template.
+        rows = db.session.query(
+            ReplenishmentPlanLine, ActualOrder,
+        ).outerjoin(
+            ActualOrder,
+            db.and_(
+                ActualOrder.store_id == ReplenishmentPlanLine.store_id,
+                ActualOrder.item_id == ReplenishmentPlanLine.item_id,
+                ActualOrder.order_date == plan_date,
+            ),
+        ).options(
+            joinedload(ReplenishmentPlanLine.store),
+            joinedload(ReplenishmentPlanLine.item),
+        ).filter(
+            ReplenishmentPlanLine.plan_id == plan.id,
+        ).all()
+
+        for line, actual in rows:
             predicted = float(line.recommended_quantity)
             actual_qty = float(actual.quantity_ordered) if actual else None
 
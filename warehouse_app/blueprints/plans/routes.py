@@ -2,11 +2,13 @@ from datetime import date, datetime
 
 from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
+from sqlalchemy import func
 
 from warehouse_app.blueprints.plans import plans_bp
 from warehouse_app.auth_helpers import admin_required
 from warehouse_app.extensions import db
 from warehouse_app.models.replenishment_plan import ReplenishmentPlan
+from warehouse_app.models.replenishment_plan_line import ReplenishmentPlanLine
 from warehouse_app.services.plan_generation import generate_plan
 from warehouse_app.services.audit import log_action
 
@@ -85,8 +87,11 @@ def delete(plan_id):
         return redirect(url_for('warehouse.pick_list', plan_date=plan.plan_date))
 
     plan_date = plan.plan_date
+    line_count = db.session.query(func.count(ReplenishmentPlanLine.id)).filter(
+        ReplenishmentPlanLine.plan_id == plan.id,
+    ).scalar()
     log_action('plan', plan.id, 'delete',
-               old_value=f'plan_date={plan_date}, lines={plan.lines.count()}')
+               old_value=f'plan_date={plan_date}, lines={line_count}')
     db.session.delete(plan)
     db.session.commit()
 
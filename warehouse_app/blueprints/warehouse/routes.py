@@ -1,3 +1,4 @@
+import math
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -86,25 +87,9 @@ def master_pick_list():
 
     pick_items = query.order_by(InventoryItem.category, InventoryItem.item_name).all()
 
-    # Single query for status summary per item
+    # One query over the plan's lines feeds both the per-store breakdown and
+    # the per-item status summary (joined to avoid N+1)
     status_summary = {}
-    status_rows = db.session.query(
-        ReplenishmentPlanLine.item_id,
-        ReplenishmentPlanLine.status,
-        func.count(ReplenishmentPlanLine.id),
-    ).filter(
-        ReplenishmentPlanLine.plan_id == plan.id
-    ).group_by(
-        ReplenishmentPlanLine.item_id,
-        ReplenishmentPlanLine.status,
-    ).all()
-
-    for item_id, status, count in status_rows:
-        if item_id not in status_summary:
-            status_summary[item_id] = {}
-        status_summary[item_id][status] = count
-
-    # Single query for store breakdown (joined to avoid N+1)
     store_breakdown = {}
     breakdown_rows = db.session.query(
         ReplenishmentPlanLine.item_id,
@@ -121,6 +106,9 @@ def master_pick_list():
     ).all()
 
     for item_id, store_name, rec_qty, act_qty, status in breakdown_rows:
+        item_statuses = status_summary.setdefault(item_id, {})
+        item_statuses[status] = item_statuses.get(status, 0) + 1
+
         if item_id not in store_breakdown:
             store_breakdown[item_id] = []
         store_breakdown[item_id].append({
@@ -246,15 +234,16 @@ def activity_log():
     # Show recent audit log entries for plan lines
     entries = []
     if plan:
-        line_ids = [lid for (lid,) in db.session.query(
+        # Filter on the plan's line ids inside the database rather than
+        # pulling every id into Python and sending them back as an IN list.
+        line_ids = db.session.query(
             ReplenishmentPlanLine.id
-        ).filter_by(plan_id=plan.id).all()]
+        ).filter_by(plan_id=plan.id).scalar_subquery()
 
-        if line_ids:
-            entries = AuditLog.query.filter(
-                AuditLog.entity_type == 'plan_line',
-                AuditLog.entity_id.in_(line_ids),
-            ).order_by(AuditLog.changed_at.desc()).limit(200).all()
+        entries = AuditLog.query.filter(
+            AuditLog.entity_type == 'plan_line',
+            AuditLog.entity_id.in_(line_ids),
+        ).order_by(AuditLog.changed_at.desc()).limit(200).all()
 
     return render_template('warehouse/activity_log.html',
                            plan=plan, plan_date=plan_date, entries=entries)
@@ -292,7 +281,6 @@ def api_update_line():
     if actual_quantity is not None:
         try:
             actual_quantity = float(actual_quantity)
-            import math
             if not math.isfinite(actual_quantity):
                 return jsonify({'error': 'actual_quantity must be a finite number'}), 400
             if actual_quantity < 0:
@@ -7,6 +7,11 @@ class Config:
     """Base configuration."""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-me')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Validate pooled connections before checkout so long-lived workers
+    # reuse connections instead of failing on ones the server dropped.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+    }
     WTF_CSRF_ENABLED = True
 
     # ── Session settings ──────────────────────────────────────
@@ -70,6 +75,17 @@ class TestingConfig(Config):
 class ProductionConfig(Config):
     """Production configuration — expects PostgreSQL via DATABASE_URL."""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    # Per-process pool: up to DB_POOL_SIZE connections kept open, plus
+    # DB_MAX_OVERFLOW short-lived extras under load (8 + 4 = 12 per worker).
+    # Multiply by the number of app worker processes to stay under the
+    # server's max_connections. Connections older than DB_POOL_RECYCLE
+    # seconds are replaced before an idle timeout on the server can drop them.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '8')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '4')),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+    }
 
 
 config_by_name = {
@@ -7,7 +7,7 @@ class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
 
     id = db.Column(db.Integer, primary_key=True)
-    entity_type = db.Column(db.String(100), nullable=False, index=True)
+    entity_type = db.Column(db.String(100), nullable=False)
     entity_id = db.Column(db.Integer, nullable=False)
     action = db.Column(db.String(50), nullable=False)
     old_value = db.Column(db.Text, nullable=True)
@@ -23,5 +23,10 @@ class AuditLog(db.Model):
     # Relationship
     changed_by_user = db.relationship('User', foreign_keys=[changed_by_user_id])
 
+    # Leads with entity_type, so it also serves entity_type-only lookups.
+    __table_args__ = (
+        db.Index('ix_audit_logs_entity', 'entity_type', 'entity_id'),
+    )
+
     def __repr__(self):
         return f'<AuditLog {self.entity_type}#{self.entity_id} {self.action}>'
@@ -2,14 +2,19 @@
 Lightweight audit logging helper.
 """
 from flask_login import current_user
+from sqlalchemy import insert
 
 from warehouse_app.extensions import db
 from warehouse_app.models.audit_log import AuditLog
 
 
+def _current_user_id():
+    return current_user.id if current_user and current_user.is_authenticated else None
+
+
 def log_action(entity_type, entity_id, action, old_value=None, new_value=None):
     """Write an audit log entry."""
-    user_id = current_user.id if current_user and current_user.is_authenticated else None
+    user_id = _current_user_id()
     entry = AuditLog(
         entity_type=entity_type,
         entity_id=entity_id,
@@ -20,3 +25,26 @@ def log_action(entity_type, entity_id, action, old_value=None, new_value=None):
     )
     db.session.add(entry)
     # Don't commit here — caller controls the transaction
+
+
+def log_actions(entity_type, entity_ids, action, old_value=None, new_value=None):
+    """Write one audit log entry per id as a single bulk INSERT.
+
+    Same fields as log_action, for batch operations that would otherwise
+    add one ORM object per id.
+    """
+    if not entity_ids:
+        return
+    user_id = _current_user_id()
+    db.session.execute(insert(AuditLog), [
+        {
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'action': action,
+            'old_value': old_value,
+            'new_value': new_value,
+            'changed_by_user_id': user_id,
+        }
+        for entity_id in entity_ids
+    ])
+    # Don't commit here — caller controls the transaction
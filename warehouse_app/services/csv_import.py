@@ -6,7 +6,8 @@ Validates rows, skips bad data, returns a summary.
 import csv
 import io
 import math
-from datetime import date, datetime
+import re
+from datetime import date
 
 from flask import current_app
 
@@ -26,16 +27,45 @@ def _get_limit(key, fallback):
         return fallback
 
 
+# Accepted date layouts as (pattern, year/month/day group order). Matching
+# these directly is much cheaper per row than trying strptime formats.
+# Digits are ASCII only, and the day may be space-padded (' 5') as
+# strptime's %d allows.
+_DAY = r'([0-9]{1,2}| [1-9])'
+_DATE_PATTERNS = (
+    (re.compile(r'([0-9]{4})-([0-9]{1,2})-' + _DAY), (1, 2, 3)),   # YYYY-MM-DD
+    (re.compile(r'([0-9]{1,2})/' + _DAY + r'/([0-9]{4})'), (3, 1, 2)),   # MM/DD/YYYY
+    (re.compile(r'([0-9]{1,2})-' + _DAY + r'-([0-9]{4})'), (3, 1, 2)),   # MM-DD-YYYY
+)
+
+
 def _parse_date(value):
     """Parse a date from common formats."""
-    for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%m-%d-%Y'):
-        try:
-            return datetime.strptime(value.strip(), fmt).date()
-        except ValueError:
-            continue
+    value = value.strip()
+    for pattern, (y, m, d) in _DATE_PATTERNS:
+        match = pattern.fullmatch(value)
+        if match:
+            try:
+                return date(int(match[y]), int(match[m]), int(match[d]))
+            except ValueError:
+                return None
     return None
 
 
+def _parse_quantity(value, max_quantity):
+    """Parse a non-negative, finite quantity no larger than ``max_quantity``.
+
+    Returns the float, or None if the value is not acceptable.
+    """
+    try:
+        quantity = float(value)
+    except (ValueError, TypeError):
+        return None
+    if not math.isfinite(quantity) or quantity < 0 or quantity > max_quantity:
+        return None
+    return quantity
+
+
 def _get_store_map():
     """Return dict mapping store code (uppercased) to store id."""
     stores = Store.query.filter_by(active=True).all()
@@ -76,21 +106,74 @@ def _is_title_row(line):
     return empty / len(parts) > 0.5
 
 
+def _normalise_header(name):
+    """Canonical form of a CSV header: trimmed, BOM-free, lower-case."""
+    return name.strip().strip('\ufeff').lower()
+
+
 def _validate_csv_headers(reader, required_fields):
     """Check that required headers are present. Returns list of missing fields."""
     if reader.fieldnames is None:
         return required_fields
-    actual = {f.strip().strip('\ufeff').lower() for f in reader.fieldnames}
+    actual = {_normalise_header(f) for f in reader.fieldnames}
     return [f for f in required_fields if f.lower() not in actual]
 
 
-def import_daily_usage_csv(file_content, source='csv_import'):
+def _upsert_rows(model, date_field, qty_field, rows, source):
+    """Insert or update validated rows keyed on (store_id, item_id, date).
+
+    ``rows`` is a list of (store_id, item_id, date, quantity, notes) tuples.
+    Existing records for the stores, items and dates in the batch are fetched
+    with one query rather than one lookup per row; later rows for the same
+    key overwrite earlier ones, as they would row by row.
     """
-    Import daily usage from CSV content.
+    if not rows:
+        return
+    store_ids = {r[0] for r in rows}
+    item_ids = {r[1] for r in rows}
+    dates = {r[2] for r in rows}
+    existing = {
+        (obj.store_id, obj.item_id, getattr(obj, date_field)): obj
+        for obj in model.query.filter(
+            model.store_id.in_(store_ids),
+            model.item_id.in_(item_ids),
+            getattr(model, date_field).in_(dates),
+        ).all()
+    }
+    for store_id, item_id, row_date, quantity, notes in rows:
+        key = (store_id, item_id, row_date)
+        obj = existing.get(key)
+        if obj is None:
+            obj = model(store_id=store_id, item_id=item_id, **{date_field: row_date})
+            db.session.add(obj)
+            existing[key] = obj
+        setattr(obj, qty_field, quantity)
+        obj.source = source
+        obj.notes = notes
+
+
+def _save_rows(model, date_field, qty_field, rows, source, errors):
+    """Upsert and commit ``rows``.
+
+    On a database error the session is rolled back and the failure is added
+    to ``errors`` instead of propagating. Returns True if the rows were saved.
+    """
+    try:
+        _upsert_rows(model, date_field, qty_field, rows, source)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        errors.append(f'Could not save imported rows \u2014 {str(e)}. No rows were imported.')
+        return False
+    return True
 
-    Expected columns: store_code, sku, usage_date, quantity_used, notes (optional)
 
-    Returns dict with imported, skipped, errors.
+def _import_store_item_csv(file_content, source, model, date_field, qty_field):
+    """
+    Shared importer for store/SKU/date/quantity CSVs.
+
+    The CSV columns are named after the model fields: store_code, sku,
+    ``date_field``, ``qty_field``, notes (optional).
     """
     max_rows = _get_limit('CSV_MAX_ROWS', 10000)
     max_quantity = _get_limit('CSV_MAX_QUANTITY', 999999)
@@ -102,7 +185,7 @@ def import_daily_usage_csv(file_content, source='csv_import'):
     reader = csv.DictReader(io.StringIO(file_content))
 
     # Validate headers
-    missing = _validate_csv_headers(reader, ['store_code', 'sku', 'usage_date', 'quantity_used'])
+    missing = _validate_csv_headers(reader, ['store_code', 'sku', date_field, qty_field])
     if missing:
         return {
             'imported': 0, 'skipped': 0,
@@ -112,6 +195,7 @@ def import_daily_usage_csv(file_content, source='csv_import'):
     imported = 0
     skipped = 0
     errors = []
+    pending = []
 
     row_count = 0
     for i, row in enumerate(reader, start=2):  # line 2 = first data row
@@ -123,8 +207,8 @@ def import_daily_usage_csv(file_content, source='csv_import'):
         try:
             store_code = row.get('store_code', '').strip().upper()
             sku = row.get('sku', '').strip().upper()
-            date_str = row.get('usage_date', '').strip()
-            qty_str = row.get('quantity_used', '').strip()
+            date_str = row.get(date_field, '').strip()
+            qty_str = row.get(qty_field, '').strip()
             notes = row.get('notes', '').strip() or None
 
             # Validate store
@@ -142,28 +226,21 @@ def import_daily_usage_csv(file_content, source='csv_import'):
                 continue
 
             # Validate date
-            usage_date = _parse_date(date_str)
-            if usage_date is None:
+            row_date = _parse_date(date_str)
+            if row_date is None:
                 errors.append(f'Row {i}: Invalid date "{date_str}"')
                 skipped += 1
                 continue
 
             # Reject future dates
-            if usage_date > date.today():
+            if row_date > date.today():
                 errors.append(f'Row {i}: Future date "{date_str}" not allowed')
                 skipped += 1
                 continue
 
             # Validate quantity
-            try:
-                quantity = float(qty_str)
-                if not math.isfinite(quantity):
-                    raise ValueError('non-finite')
-                if quantity < 0:
-                    raise ValueError('negative')
-                if quantity > max_quantity:
-                    raise ValueError('too large')
-            except (ValueError, TypeError):
+            quantity = _parse_quantity(qty_str, max_quantity)
+            if quantity is None:
                 errors.append(f'Row {i}: Invalid quantity "{qty_str}"')
                 skipped += 1
                 continue
@@ -172,136 +249,41 @@ def import_daily_usage_csv(file_content, source='csv_import'):
             if notes and len(notes) > max_note_len:
                 notes = notes[:max_note_len]
 
-            # Upsert: update if exists, insert if not
-            existing = DailyUsage.query.filter_by(
-                store_id=store_id, item_id=item_id, usage_date=usage_date,
-            ).first()
-
-            if existing:
-                existing.quantity_used = quantity
-                existing.source = source
-                existing.notes = notes
-            else:
-                db.session.add(DailyUsage(
-                    store_id=store_id, item_id=item_id,
-                    usage_date=usage_date, quantity_used=quantity,
-                    source=source, notes=notes,
-                ))
+            pending.append((store_id, item_id, row_date, quantity, notes))
             imported += 1
 
         except Exception as e:
             errors.append(f'Row {i}: Unexpected error \u2014 {str(e)}')
             skipped += 1
 
-    db.session.commit()
+    if not _save_rows(model, date_field, qty_field, pending, source, errors):
+        skipped += imported
+        imported = 0
     return {'imported': imported, 'skipped': skipped, 'errors': errors}
 
 
-def import_inventory_snapshot_csv(file_content, source='csv_import'):
+def import_daily_usage_csv(file_content, source='csv_import'):
     """
-    Import inventory snapshots from CSV content.
+    Import daily usage from CSV content.
 
-    Expected columns: store_code, sku, snapshot_date, quantity_on_hand, notes (optional)
+    Expected columns: store_code, sku, usage_date, quantity_used, notes (optional)
 
     Returns dict with imported, skipped, errors.
     """
-    max_rows = _get_limit('CSV_MAX_ROWS', 10000)
-    max_quantity = _get_limit('CSV_MAX_QUANTITY', 999999)
-    max_note_len = _get_limit('CSV_MAX_NOTE_LENGTH', 500)
-
-    store_map = _get_store_map()
-    item_map = _get_item_map()
-
-    reader = csv.DictReader(io.StringIO(file_content))
-
-    # Validate headers
-    missing = _validate_csv_headers(reader, ['store_code', 'sku', 'snapshot_date', 'quantity_on_hand'])
-    if missing:
-        return {
-            'imported': 0, 'skipped': 0,
-            'errors': [f'Missing required columns: {", ".join(missing)}'],
-        }
-
-    imported = 0
-    skipped = 0
-    errors = []
-
-    row_count = 0
-    for i, row in enumerate(reader, start=2):
-        if row_count >= max_rows:
-            errors.append(f'Row limit of {max_rows} exceeded. Remaining rows skipped.')
-            break
-        row_count += 1
-
-        try:
-            store_code = row.get('store_code', '').strip().upper()
-            sku = row.get('sku', '').strip().upper()
-            date_str = row.get('snapshot_date', '').strip()
-            qty_str = row.get('quantity_on_hand', '').strip()
-            notes = row.get('notes', '').strip() or None
+    return _import_store_item_csv(file_content, source, DailyUsage, 'usage_date', 'quantity_used')
 
-            store_id = store_map.get(store_code)
-            if store_id is None:
-                errors.append(f'Row {i}: Unknown store code "{store_code}"')
-                skipped += 1
-                continue
 
-            item_id = item_map.get(sku)
-            if item_id is None:
-                errors.append(f'Row {i}: Unknown SKU "{sku}"')
-                skipped += 1
-                continue
-
-            snapshot_date = _parse_date(date_str)
-            if snapshot_date is None:
-                errors.append(f'Row {i}: Invalid date "{date_str}"')
-                skipped += 1
-                continue
-
-            # Reject future dates
-            if snapshot_date > date.today():
-                errors.append(f'Row {i}: Future date "{date_str}" not allowed')
-                skipped += 1
-                continue
-
-            try:
-                quantity = float(qty_str)
-                if not math.isfinite(quantity):
-                    raise ValueError('non-finite')
-                if quantity < 0:
-                    raise ValueError('negative')
-                if quantity > max_quantity:
-                    raise ValueError('too large')
-            except (ValueError, TypeError):
-                errors.append(f'Row {i}: Invalid quantity "{qty_str}"')
-                skipped += 1
-                continue
-
-            if notes and len(notes) > max_note_len:
-                notes = notes[:max_note_len]
-
-            existing = InventorySnapshot.query.filter_by(
-                store_id=store_id, item_id=item_id, snapshot_date=snapshot_date,
-            ).first()
-
-            if existing:
-                existing.quantity_on_hand = quantity
-                existing.source = source
-                existing.notes = notes
-            else:
-                db.session.add(InventorySnapshot(
-                    store_id=store_id, item_id=item_id,
-                    snapshot_date=snapshot_date, quantity_on_hand=quantity,
-                    source=source, notes=notes,
-                ))
-            imported += 1
+def import_inventory_snapshot_csv(file_content, source='csv_import'):
+    """
+    Import inventory snapshots from CSV content.
 
-        except Exception as e:
-            errors.append(f'Row {i}: Unexpected error \u2014 {str(e)}')
-            skipped += 1
+    Expected columns: store_code, sku, snapshot_date, quantity_on_hand, notes (optional)
 
-    db.session.commit()
-    return {'imported': imported, 'skipped': skipped, 'errors': errors}
+    Returns dict with imported, skipped, errors.
+    """
+    return _import_store_item_csv(
+        file_content, source, InventorySnapshot, 'snapshot_date', 'quantity_on_hand',
+    )
 
 
 def _detect_actual_orders_format(fieldnames):
@@ -313,7 +295,7 @@ def _detect_actual_orders_format(fieldnames):
     if fieldnames is None:
         return 'legacy', ['store_code', 'sku', 'order_date', 'quantity_ordered']
 
-    actual = {f.strip().strip('\ufeff').lower() for f in fieldnames}
+    actual = {_normalise_header(f) for f in fieldnames}
 
     # Sales enquiry format: Order Date, Customer, Product, Quantity
     sales_required = ['order date', 'customer', 'product', 'quantity']
@@ -375,6 +357,10 @@ def import_actual_orders_csv(file_content, source='csv_import'):
     store_code_map = _get_store_map()
     item_sku_map = _get_item_map()
 
+    # Normalise header names once; each row is then re-keyed by lookup
+    # instead of re-stripping every column name per row.
+    header_keys = {k: _normalise_header(k) for k in reader.fieldnames}
+
     if fmt == 'sales_enquiry':
         store_name_map = _get_store_name_map()
         item_name_map = _get_item_name_map()
@@ -382,6 +368,7 @@ def import_actual_orders_csv(file_content, source='csv_import'):
     imported = 0
     skipped = 0
     errors = []
+    pending = []
 
     row_count = 0
     for i, row in enumerate(reader, start=2):
@@ -392,7 +379,7 @@ def import_actual_orders_csv(file_content, source='csv_import'):
 
         try:
             # Normalise keys to lower-case for consistent lookup
-            normalised = {k.strip().strip('\ufeff').lower(): v for k, v in row.items()}
+            normalised = {header_keys.get(k) or _normalise_header(k): v for k, v in row.items()}
 
             if fmt == 'sales_enquiry':
                 customer = normalised.get('customer', '').strip().upper()
@@ -442,15 +429,8 @@ def import_actual_orders_csv(file_content, source='csv_import'):
                 skipped += 1
                 continue
 
-            try:
-                quantity = float(qty_str)
-                if not math.isfinite(quantity):
-                    raise ValueError('non-finite')
-                if quantity < 0:
-                    raise ValueError('negative')
-                if quantity > max_quantity:
-                    raise ValueError('too large')
-            except (ValueError, TypeError):
+            quantity = _parse_quantity(qty_str, max_quantity)
+            if quantity is None:
                 errors.append(f'Row {i}: Invalid quantity "{qty_str}"')
                 skipped += 1
                 continue
@@ -458,25 +438,14 @@ def import_actual_orders_csv(file_content, source='csv_import'):
             if notes and len(notes) > max_note_len:
                 notes = notes[:max_note_len]
 
-            existing = ActualOrder.query.filter_by(
-                store_id=store_id, item_id=item_id, order_date=order_date,
-            ).first()
-
-            if existing:
-                existing.quantity_ordered = quantity
-                existing.source = source
-                existing.notes = notes
-            else:
-                db.session.add(ActualOrder(
-                    store_id=store_id, item_id=item_id,
-                    order_date=order_date, quantity_ordered=quantity,
-                    source=source, notes=notes,
-                ))
+            pending.append((store_id, item_id, order_date, quantity, notes))
             imported += 1
 
         except Exception as e:
             errors.append(f'Row {i}: Unexpected error \u2014 {str(e)}')
             skipped += 1
 
-    db.session.commit()
+    if not _save_rows(ActualOrder, 'order_date', 'quantity_ordered', pending, source, errors):
+        skipped += imported
+        imported = 0
     return {'imported': imported, 'skipped': skipped, 'errors': errors}
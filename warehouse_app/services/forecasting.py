@@ -39,23 +39,20 @@ def _to_decimal(val):
 
 # ── Data access helpers ──────────────────────────────────────────────
 
-def get_average_orders(store_id, item_id, plan_date, days):
+def _load_demand_rows(store_id, item_id, plan_date, days):
     """
-    Return simple arithmetic average daily demand over the window.
+    Fetch raw (date, qty) daily-usage and actual-order rows for the ``days``
+    before plan_date.
 
-    Merges actual orders with daily usage: for each date in the window,
-    actual orders take priority. Daily usage fills in dates with no orders.
+    Callers that need several windows ending at plan_date can fetch the
+    longest once and pass it as ``history`` to the averaging functions.
 
     Returns:
-        (avg_demand: Decimal, record_count: int, source: str)
+        (usage_rows, order_rows)
     """
     start_date = plan_date - timedelta(days=days)
     end_date = plan_date - timedelta(days=1)
 
-    # Build a per-date quantity map: actual orders take priority
-    demand_by_date = {}
-
-    # Load daily usage first (lower priority)
     usage_rows = db.session.query(
         DailyUsage.usage_date, DailyUsage.quantity_used,
     ).filter(
@@ -64,10 +61,7 @@ def get_average_orders(store_id, item_id, plan_date, days):
         DailyUsage.usage_date >= start_date,
         DailyUsage.usage_date <= end_date,
     ).all()
-    for row_date, qty in usage_rows:
-        demand_by_date[row_date] = _to_decimal(qty)
 
-    # Overlay actual orders (higher priority — overwrites usage for same date)
     order_rows = db.session.query(
         ActualOrder.order_date, ActualOrder.quantity_ordered,
     ).filter(
@@ -76,9 +70,52 @@ def get_average_orders(store_id, item_id, plan_date, days):
         ActualOrder.order_date >= start_date,
         ActualOrder.order_date <= end_date,
     ).all()
-    has_orders = len(order_rows) > 0
+
+    return usage_rows, order_rows
+
+
+def _merge_demand(history, start_date, convert):
+    """
+    Build a per-date demand map from rows on or after start_date.
+
+    Actual orders take priority: they overwrite daily usage for the same date.
+
+    Returns:
+        (demand_by_date: dict, has_usage: bool, has_orders: bool)
+    """
+    usage_rows, order_rows = history
+    demand_by_date = {}
+    has_usage = has_orders = False
+
+    for row_date, qty in usage_rows:
+        if row_date >= start_date:
+            demand_by_date[row_date] = convert(qty)
+            has_usage = True
+
     for row_date, qty in order_rows:
-        demand_by_date[row_date] = _to_decimal(qty)
+        if row_date >= start_date:
+            demand_by_date[row_date] = convert(qty)
+            has_orders = True
+
+    return demand_by_date, has_usage, has_orders
+
+
+def get_average_orders(store_id, item_id, plan_date, days, history=None):
+    """
+    Return simple arithmetic average daily demand over the window.
+
+    Merges actual orders with daily usage: for each date in the window,
+    actual orders take priority. Daily usage fills in dates with no orders.
+    ``history`` optionally supplies rows from _load_demand_rows covering
+    at least this window.
+
+    Returns:
+        (avg_demand: Decimal, record_count: int, source: str)
+    """
+    if history is None:
+        history = _load_demand_rows(store_id, item_id, plan_date, days)
+    demand_by_date, has_usage, has_orders = _merge_demand(
+        history, plan_date - timedelta(days=days), _to_decimal)
 
     if not demand_by_date:
         return Decimal('0'), 0, 'none'
@@ -87,7 +124,7 @@ def get_average_orders(store_id, item_id, plan_date, days):
     count = len(demand_by_date)
     avg = total / count
 
-    source = 'blended' if has_orders and usage_rows else (
+    source = 'blended' if has_orders and has_usage else (
         'actual_orders' if has_orders else 'daily_usage')
 
     return avg, count, source
@@ -107,48 +144,29 @@ def get_average_usage(store_id, item_id, plan_date, days):
 
 
 def get_weighted_average_orders(store_id, item_id, plan_date, days,
-                                decay_factor, dow_multiplier=0.0):
+                                decay_factor, dow_multiplier=0.0, history=None):
     """
     Return exponentially-weighted average daily demand.
 
     Merges actual orders with daily usage: for each date in the window,
     actual orders take priority. Daily usage fills in dates with no orders.
+    ``history`` optionally supplies rows from _load_demand_rows covering
+    at least this window.
 
     Returns:
         (weighted_avg: Decimal, record_count: int, dow_matches: int, source: str)
     """
-    start_date = plan_date - timedelta(days=days)
-    end_date = plan_date - timedelta(days=1)
     plan_weekday = plan_date.weekday()
 
-    # Build a per-date quantity map: actual orders take priority
-    demand_by_date = {}
-
-    # Load daily usage first (lower priority)
-    usage_rows = DailyUsage.query.filter(
-        DailyUsage.store_id == store_id,
-        DailyUsage.item_id == item_id,
-        DailyUsage.usage_date >= start_date,
-        DailyUsage.usage_date <= end_date,
-    ).all()
-    for u in usage_rows:
-        demand_by_date[u.usage_date] = _to_decimal(u.quantity_used)
-
-    # Overlay actual orders (higher priority)
-    order_rows = ActualOrder.query.filter(
-        ActualOrder.store_id == store_id,
-        ActualOrder.item_id == item_id,
-        ActualOrder.order_date >= start_date,
-        ActualOrder.order_date <= end_date,
-    ).all()
-    has_orders = len(order_rows) > 0
-    for o in order_rows:
-        demand_by_date[o.order_date] = _to_decimal(o.quantity_ordered)
+    if history is None:
+        history = _load_demand_rows(store_id, item_id, plan_date, days)
+    demand_by_date, has_usage, has_orders = _merge_demand(
+        history, plan_date - timedelta(days=days), _to_decimal)
 
     if not demand_by_date:
         return Decimal('0'), 0, 0, 'none'
 
-    source = 'blended' if has_orders and usage_rows else (
+    source = 'blended' if has_orders and has_usage else (
         'actual_orders' if has_orders else 'daily_usage')
 
     total_weighted = Decimal('0')
@@ -255,10 +273,12 @@ def _compute_coverage(record_count, window_days):
 # ── Simple forecast builder ──────────────────────────────────────────
 
 def _build_simple_forecast(store_id, item_id, plan_date,
-                           window_short, window_long, min_data_points):
+                           window_short, window_long, min_data_points,
+                           history=None):
     """
     Build a forecast using unweighted simple averages.
     Uses actual orders as primary data, falls back to daily usage.
+    ``history`` optionally supplies rows covering both windows.
 
     Returns the standard forecast dict.
     """
@@ -266,10 +286,13 @@ def _build_simple_forecast(store_id, item_id, plan_date,
     explanations = []
     warnings = []
 
+    # Both windows end at plan_date; fetch the longer one once and slice it
+    if history is None:
+        history = _load_demand_rows(store_id, item_id, plan_date, max(window_short, window_long))
     avg_short, count_short, source_short = get_average_orders(
-        store_id, item_id, plan_date, window_short)
+        store_id, item_id, plan_date, window_short, history=history)
     avg_long, count_long, source_long = get_average_orders(
-        store_id, item_id, plan_date, window_long)
+        store_id, item_id, plan_date, window_long, history=history)
 
     data_source = source_short or source_long
 
@@ -342,10 +365,11 @@ def _build_simple_forecast(store_id, item_id, plan_date,
 
 def _build_weighted_forecast(store_id, item_id, plan_date,
                              window_short, window_long, min_data_points,
-                             decay_factor, dow_multiplier):
+                             decay_factor, dow_multiplier, history=None):
     """
     Build a forecast using exponential recency decay and optional DOW weighting.
     Uses actual orders as primary data, falls back to daily usage.
+    ``history`` optionally supplies rows covering both windows.
 
     Returns the standard forecast dict.
     """
@@ -354,13 +378,19 @@ def _build_weighted_forecast(store_id, item_id, plan_date,
     warnings = []
     dow_enabled = dow_multiplier > 0
 
+    # Both windows end at plan_date; fetch the longer one once and slice it
+    if history is None:
+        history = _load_demand_rows(store_id, item_id, plan_date, max(window_short, window_long))
+
     # Short window
     avg_short, count_short, dow_short, source_short = get_weighted_average_orders(
-        store_id, item_id, plan_date, window_short, decay_factor, dow_multiplier)
+        store_id, item_id, plan_date, window_short, decay_factor, dow_multiplier,
+        history=history)
 
     # Long window
     avg_long, count_long, dow_long, source_long = get_weighted_average_orders(
-        store_id, item_id, plan_date, window_long, decay_factor, dow_multiplier)
+        store_id, item_id, plan_date, window_long, decay_factor, dow_multiplier,
+        history=history)
 
     data_source = source_short or source_long
 
@@ -458,11 +488,13 @@ def _build_weighted_forecast(store_id, item_id, plan_date,
 
 # ── Lane routing helpers ─────────────────────────────────────────────
 
-def _get_demand_stats(store_id, item_id, plan_date, window_days):
+def _get_demand_stats(store_id, item_id, plan_date, window_days, history=None):
     """
     Compute demand statistics over a lookback window for lane classification.
 
     Uses the same ActualOrder-over-DailyUsage priority as get_average_orders.
+    ``history`` optionally supplies rows from _load_demand_rows covering
+    at least this window.
 
     Returns a dict:
         zero_rate    — fraction of recorded days with zero demand (0.0–1.0)
@@ -472,32 +504,10 @@ def _get_demand_stats(store_id, item_id, plan_date, window_days):
         n_days       — total days with any record in the window
         n_order_days — days where quantity > 0
     """
-    start_date = plan_date - timedelta(days=window_days)
-    end_date = plan_date - timedelta(days=1)
-
-    demand_by_date = {}
-
-    usage_rows = db.session.query(
-        DailyUsage.usage_date, DailyUsage.quantity_used,
-    ).filter(
-        DailyUsage.store_id == store_id,
-        DailyUsage.item_id == item_id,
-        DailyUsage.usage_date >= start_date,
-        DailyUsage.usage_date <= end_date,
-    ).all()
-    for row_date, qty in usage_rows:
-        demand_by_date[row_date] = float(qty or 0)
-
-    order_rows = db.session.query(
-        ActualOrder.order_date, ActualOrder.quantity_ordered,
-    ).filter(
-        ActualOrder.store_id == store_id,
-        ActualOrder.item_id == item_id,
-        ActualOrder.order_date >= start_date,
-        ActualOrder.order_date <= end_date,
-    ).all()
-    for row_date, qty in order_rows:
-        demand_by_date[row_date] = float(qty or 0)
+    if history is None:
+        history = _load_demand_rows(store_id, item_id, plan_date, window_days)
+    demand_by_date, _has_usage, _has_orders = _merge_demand(
+        history, plan_date - timedelta(days=window_days), lambda qty: float(qty or 0))
 
     if not demand_by_date:
         return {
@@ -769,7 +779,11 @@ def build_forecast(store_id, item_id, plan_date):
     item = db.session.get(InventoryItem, item_id)
     item_name = item.item_name if item else ''
 
-    stats = _get_demand_stats(store_id, item_id, plan_date, routing_window)
+    # Routing and the daily-lane windows all end at plan_date: one fetch of
+    # the longest window serves every lookback below.
+    history = _load_demand_rows(
+        store_id, item_id, plan_date, max(routing_window, window_short, window_long))
+    stats = _get_demand_stats(store_id, item_id, plan_date, routing_window, history=history)
     lane = _classify_lane(item_name, stats, dormant_threshold, intermittent_threshold)
 
     # ── Dispatch ─────────────────────────────────────────────
@@ -790,12 +804,12 @@ def build_forecast(store_id, item_id, plan_date):
         result = _build_weighted_forecast(
             store_id, item_id, plan_date,
             window_short, window_long, min_data_points,
-            decay_factor, dow_multiplier,
+            decay_factor, dow_multiplier, history=history,
         )
     else:
         result = _build_simple_forecast(
             store_id, item_id, plan_date,
-            window_short, window_long, min_data_points,
+            window_short, window_long, min_data_points, history=history,
         )
     result['forecast_lane'] = 'daily'
     return result
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 
 from warehouse_app.extensions import db
 from warehouse_app.models.replenishment_plan_line import ReplenishmentPlanLine
-from warehouse_app.services.audit import log_action
+from warehouse_app.services.audit import log_action, log_actions
 
 VALID_STATUSES = ('pending', 'picked', 'loaded', 'delivered', 'shorted')
 
@@ -59,8 +59,7 @@ def bulk_update_status(line_ids, new_status):
         ReplenishmentPlanLine.last_status_change_at: now,
     }, synchronize_session='fetch')
 
-    for line_id in line_ids:
-        log_action('plan_line', line_id, 'bulk_update', new_value=f'status -> {new_status}')
+    log_actions('plan_line', line_ids, 'bulk_update', new_value=f'status -> {new_status}')
 
     db.session.commit()
     return count
@@ -6,6 +6,7 @@ Orchestrates the creation of a replenishment plan for a given date.
 from datetime import datetime, timezone
 
 from flask import current_app
+from sqlalchemy import insert
 
 from warehouse_app.extensions import db
 from warehouse_app.models.store import Store
@@ -45,22 +46,29 @@ def generate_plan(plan_date, user_id, regenerate=False):
                 f'Cannot regenerate a plan with status "{existing.status}". '
                 'Only draft plans can be regenerated.'
             )
-        # Log the regeneration before deleting
-        log_action('plan', existing.id, 'regenerate',
-                   old_value=f'plan_date={plan_date}, lines={existing.lines.count()}')
-        # Delete existing draft lines and plan
-        ReplenishmentPlanLine.query.filter_by(plan_id=existing.id).delete()
-        db.session.delete(existing)
-        db.session.flush()
 
-    # Verify there are active settings to generate from
-    active_settings = StoreItemSetting.query.filter_by(active=True).all()
-    if not active_settings:
+    # Verify there are active settings to generate from before touching an
+    # existing draft. Only the (store_id, item_id) pairs are needed.
+    settings_pairs = {
+        (store_id, item_id) for store_id, item_id in db.session.query(
+            StoreItemSetting.store_id, StoreItemSetting.item_id,
+        ).filter_by(active=True)
+    }
+    if not settings_pairs:
         raise ValueError(
             'No active store-item settings found. '
             'Create settings in Admin > Store Item Settings before generating a plan.'
         )
 
+    if existing:
+        # Delete existing draft lines and plan; the bulk delete's rowcount
+        # doubles as the line count for the audit entry.
+        deleted_lines = ReplenishmentPlanLine.query.filter_by(plan_id=existing.id).delete()
+        log_action('plan', existing.id, 'regenerate',
+                   old_value=f'plan_date={plan_date}, lines={deleted_lines}')
+        db.session.delete(existing)
+        db.session.flush()
+
     # Create new plan
     plan = ReplenishmentPlan(
         plan_date=plan_date,
@@ -71,11 +79,9 @@ def generate_plan(plan_date, user_id, regenerate=False):
     db.session.add(plan)
     db.session.flush()
 
-    # Build set of (store_id, item_id) with settings
-    settings_pairs = {(s.store_id, s.item_id) for s in active_settings}
-
-    # Generate lines only for store-item pairs that have settings
-    lines = []
+    # Generate lines only for store-item pairs that have settings.
+    # Rows are collected as plain dicts and written with one bulk INSERT.
+    line_rows = []
     stats = {
         'total_lines': 0,
         'low_confidence': 0,
@@ -92,24 +98,23 @@ def generate_plan(plan_date, user_id, regenerate=False):
             stats['zero_qty_skipped'] += 1
             continue
 
-        line = ReplenishmentPlanLine(
-            plan_id=plan.id,
-            store_id=store_id,
-            item_id=item_id,
-            recommended_quantity=rec['recommended_quantity'],
-            actual_quantity=None,
-            status='pending',
-            confidence_level=rec['confidence_level'],
-            explanation_text=rec['explanation_text'],
-            warning_flags=rec['warning_flags'],
+        line_rows.append({
+            'plan_id': plan.id,
+            'store_id': store_id,
+            'item_id': item_id,
+            'recommended_quantity': rec['recommended_quantity'],
+            'actual_quantity': None,
+            'status': 'pending',
+            'confidence_level': rec['confidence_level'],
+            'explanation_text': rec['explanation_text'],
+            'warning_flags': rec['warning_flags'],
             # Forecast metadata
-            forecast_method=rec.get('forecast_method', 'historical_simple_v1'),
-            forecast_avg_daily_usage=rec['forecast_avg_daily_usage'],
-            forecast_on_hand=rec['forecast_on_hand'],
-            forecast_target=rec['forecast_target'],
-            forecast_window_days=rec['forecast_window_days'],
-        )
-        lines.append(line)
+            'forecast_method': rec.get('forecast_method', 'historical_simple_v1'),
+            'forecast_avg_daily_usage': rec['forecast_avg_daily_usage'],
+            'forecast_on_hand': rec['forecast_on_hand'],
+            'forecast_target': rec['forecast_target'],
+            'forecast_window_days': rec['forecast_window_days'],
+        })
 
         stats['total_lines'] += 1
         stats['stores'].add(store_id)
@@ -118,7 +123,8 @@ def generate_plan(plan_date, user_id, regenerate=False):
         if rec['warning_flags']:
             stats['warnings'] += 1
 
-    db.session.add_all(lines)
+    if line_rows:
+        db.session.execute(insert(ReplenishmentPlanLine), line_rows)
 
     log_action('plan', plan.id, 'generate',
                new_value=f'plan_date={plan_date}, lines={stats["total_lines"]}, '